@@ -0,0 +1,127 @@
+"""
+Season analytics from managers' gameweek histories.
+
+Every history is loaded once into manager x gameweek NumPy matrices, so form,
+streaks, bench waste and rank volatility are computed for the whole league
+with array operations rather than a Python loop per manager.
+"""
+import numpy as np
+
+# Number of recent gameweeks averaged for "form"
+FORM_WINDOW = 5
+
+_STREAK_LETTERS = {1: "W", 0: "D", -1: "L"}
+
+
+class SeasonMatrix:
+    """
+    Manager x gameweek matrices built from ``entry/{id}/history`` responses.
+
+    Row ``i`` belongs to ``entries[i]`` and column ``j`` to gameweek ``j + 1``,
+    up to ``gameweek``. ``played`` marks the cells a history row exists for;
+    elsewhere ``points``, ``bench`` and ``hits`` are 0 and ``rank`` is NaN.
+    """
+
+    __slots__ = ("entries", "row", "points", "bench", "hits", "rank", "played")
+
+    def __init__(self, histories, gameweek):
+        self.entries = list(histories)
+        self.row = {entry: i for i, entry in enumerate(self.entries)}
+
+        cells = [
+            (i, gw["event"] - 1, gw.get("points", 0), gw.get("points_on_bench", 0),
+             gw.get("event_transfers_cost", 0), gw.get("overall_rank") or np.nan)
+            for i, entry in enumerate(self.entries)
+            for gw in histories[entry].get("current", [])
+            if gw["event"] <= gameweek
+        ]
+        if cells:
+            rows, cols, points, bench, hits, rank = (np.array(column) for column in zip(*cells))
+        else:
+            rows = cols = points = bench = hits = rank = np.array([], dtype=int)
+
+        shape = (len(self.entries), gameweek)
+        self.points = np.zeros(shape, dtype=np.int32)
+        self.bench = np.zeros(shape, dtype=np.int32)
+        self.hits = np.zeros(shape, dtype=np.int32)
+        self.rank = np.full(shape, np.nan)
+        self.played = np.zeros(shape, dtype=bool)
+        self.points[rows, cols] = points
+        self.bench[rows, cols] = bench
+        self.hits[rows, cols] = hits
+        self.rank[rows, cols] = rank
+        self.played[rows, cols] = True
+
+    def results(self, fixtures):
+        """
+        H2H results as a manager x gameweek matrix of 1 (win), 0 (draw) and
+        -1 (loss), plus a mask of the cells that had a match.
+        """
+        results = np.zeros(self.points.shape, dtype=np.int8)
+        mask = np.zeros(self.points.shape, dtype=bool)
+        gameweeks = self.points.shape[1]
+        matches = [m for m in fixtures if m["event"] <= gameweeks]
+        if not matches:
+            return results, mask
+
+        cols = np.array([m["event"] - 1 for m in matches])
+        margin = np.sign(np.array([m["entry_1_points"] - m["entry_2_points"] for m in matches]))
+        for side, sign in (("entry_1_entry", 1), ("entry_2_entry", -1)):
+            rows = np.array([self.row.get(m[side], -1) for m in matches])
+            known = rows >= 0  # AVERAGE and managers without a history
+            results[rows[known], cols[known]] = sign * margin[known]
+            mask[rows[known], cols[known]] = True
+        return results, mask
+
+
+def current_streaks(results, mask):
+    """
+    Length and result (1/0/-1) of each manager's current run of identical
+    results, counting back from their latest match.
+    """
+    # Index of each manager's latest match, read from the right
+    last_col = results.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+    last = results[np.arange(len(results)), last_col]
+    same = (results == last[:, None]) & mask
+    # Ignore the columns after the latest match, then count the trailing run
+    same |= np.arange(results.shape[1]) > last_col[:, None]
+    reversed_same = same[:, ::-1]
+    length = np.where(reversed_same.all(axis=1), results.shape[1], np.argmin(reversed_same, axis=1))
+    length -= results.shape[1] - 1 - last_col
+    length[~mask.any(axis=1)] = 0
+    return last, length
+
+
+def season_stats(matrix, fixtures=()):
+    """
+    Return ``{manager ID: stats}`` for every manager in ``matrix``: form over
+    the last FORM_WINDOW gameweeks, season average, current H2H streak (from
+    ``fixtures``), total points left on the bench, total transfer hits and
+    rank volatility (mean week-to-week overall rank movement).
+    """
+    net = matrix.points - matrix.hits
+    played = matrix.played
+
+    window = slice(-FORM_WINDOW, None)
+    form = net[:, window].sum(axis=1) / np.maximum(played[:, window].sum(axis=1), 1)
+    season_average = net.sum(axis=1) / np.maximum(played.sum(axis=1), 1)
+    bench_total = matrix.bench.sum(axis=1)
+    hits_total = matrix.hits.sum(axis=1)
+
+    moves = np.abs(np.diff(matrix.rank, axis=1))
+    has_moves = ~np.isnan(moves)
+    rank_volatility = np.where(has_moves, moves, 0).sum(axis=1) / np.maximum(has_moves.sum(axis=1), 1)
+
+    streak_result, streak_length = current_streaks(*matrix.results(fixtures))
+
+    return {
+        entry: {
+            "form": round(float(form[i]), 1),
+            "season_average": round(float(season_average[i]), 1),
+            "streak": f"{_STREAK_LETTERS[int(streak_result[i])]}{int(streak_length[i])}" if streak_length[i] else None,
+            "bench_points_total": int(bench_total[i]),
+            "transfer_hits_total": int(hits_total[i]),
+            "rank_volatility": int(round(rank_volatility[i])),
+        }
+        for i, entry in enumerate(matrix.entries)
+    }
@@ -2,36 +2,60 @@ import json
 import streamlit as st
 from pathlib import Path
 from pprint import pprint
-from utils import (
-    get_h2h_league_standings,
-    get_h2h_league_matches,
-    get_manager_history,
-    get_gameweek_picks,
-    get_player_data,
-    get_latest_gameweek
-)
-from llm_summary import query_ollama, save_output
+import os
+import time
+from artifacts import latest_artifact_gameweek, load_artifact
+from metrics import METRICS, start_run
+from pipeline import apply_bios, build_instructions
+from resources import SharedResources
+from prompt_encoder import count_tokens, encode_match_reports
+from llm_summary import query_ollama, save_output, stream_ollama, tee_to_file
+from round_up import generate_round_up
 
 # Page configuration
 st.set_page_config(page_title="FPL League Match Reports", layout="wide")
 st.title("⚽ FPL League Match Reports Generator")
 
-# Initialize session state for configs
-if "config" not in st.session_state:
-    with open("fpl_data/config.json") as f:
-        st.session_state.config = json.load(f)
 
-if "bios" not in st.session_state:
-    with open("fpl_data/bios.json") as f:
-        st.session_state.bios = json.load(f)
+# The data stage (API fetches through to match reports) only depends on the
+# league and gameweek, so reruns caused by editing bios, prompts or tone
+# reuse it and only the cheap prompt assembly runs again.
+DATA_TTL = 5 * 60
+
+# st.json renders every node in the browser; bigger leagues show this many
+# reports and offer the rest as a JSONL download (see large_league.py)
+MAX_JSON_MATCHES = 100
 
-if "prompt_task" not in st.session_state:
-    with open("prompt_task.md") as f:
-        st.session_state.prompt_task = f.read()
 
-if "prompt_detail" not in st.session_state:
+@st.cache_resource
+def shared_resources():
+    # One per process: every browser session shares the HTTP session, the
+    # player table and the data stage, and concurrent loads of the same
+    # league wait for a single fetch
+    return SharedResources(data_ttl=DATA_TTL)
+
+
+@st.cache_data(show_spinner=False)
+def load_defaults():
+    """Read the config, bios and prompt files once; each session edits its own copy."""
+    defaults = {}
+    with open("fpl_data/config.json") as f:
+        defaults["config"] = json.load(f)
+    with open("fpl_data/bios.json") as f:
+        defaults["bios"] = json.load(f)
+    with open("prompt_task.md") as f:
+        defaults["prompt_task"] = f.read()
     with open("prompt_detail.md") as f:
-        st.session_state.prompt_detail = f.read()
+        defaults["prompt_detail"] = f.read()
+    return defaults
+
+
+shared = shared_resources()
+
+# Initialize session state for configs
+for key, value in load_defaults().items():
+    if key not in st.session_state:
+        st.session_state[key] = value
 
 
 # Sidebar for configuration
@@ -47,7 +71,8 @@ with st.sidebar:
     )
     latest_gameweek = st.number_input(
         "Latest Gameweek",
-        value = int(get_latest_gameweek()),
+        # Default to the latest gameweek, even if older precomputed reports exist
+        value = int(max(latest_artifact_gameweek(int(h2h_league_id)) or 0, shared.latest_gameweek() or 0) or 1),
         #value=int(st.session_state.config.get("latest_gameweek", 23)),
         min_value=1,
         max_value=38,
@@ -65,6 +90,38 @@ with st.sidebar:
         help="Select how harsh/critical the tone of the report should be (1 = mild, 5 = savage)."
     )
     st.session_state.brutality_level = int(brutality_level)
+
+    # LLM settings
+    st.subheader("LLM Settings")
+    generate_summary = st.checkbox(
+        "Generate summary with Ollama",
+        value=False,
+        help="Stream a round-up from a local Ollama model once the prompt is built."
+    )
+    ollama_model = st.text_input(
+        "Ollama model",
+        value="phi4",
+        help="Name of a model you have pulled with Ollama."
+    )
+    generation_mode = st.radio(
+        "Generation mode",
+        ["Single prompt (streamed)", "Per match (parallel)"],
+        help="Per match writes each fixture with its own smaller prompt, several at once, "
+             "then adds a short league table summary. Faster on big leagues."
+    )
+    prompt_token_budget = st.number_input(
+        "Prompt token budget",
+        value=int(st.session_state.config.get("prompt_token_budget") or 0),
+        min_value=0,
+        step=500,
+        help="Approximate token limit for the match data in the prompt. Lower-priority detail "
+             "(bench lists, bios, lowest scorers) is trimmed first. 0 = no limit."
+    )
+    force_regenerate = st.checkbox(
+        "Force regenerate",
+        value=False,
+        help="Ignore any cached summary for this exact prompt and model and run the model again."
+    )
     
     # Bios editor
     st.subheader("Team Bios")
@@ -122,238 +179,59 @@ with col2:
     st.write("Edit the configuration in the sidebar, then run the pipeline.")
 
 
-def get_average_standings(standings, match):
-    """Extract average standings from league standings"""
-    for position in standings:
-        if position["entry_name"] == "AVERAGE":
-            rank = position["rank"]
-            previous_rank = position["last_rank"]
-            league_points = position["total"]
-            total_points = position["points_for"]
-            break
-    return {
-        "name": st.session_state.bios.get(str(1000001), {}).get("team_name", "Unknown"),
-        "manager_points": match["entry_1_points"],
-        "league_rank": rank,
-        "previous_league_rank": previous_rank,
-        "overall_league_points": league_points,
-        "overall_fpl_points": total_points,
-        "background": st.session_state.bios.get(str(1000001), "No bio available.")
-    }
-
-
-def extract_match_summary(manager_id, gameweek, player_name_lookup, player_points_lookup, standings):
-    """Extract summary for a single match.
-
-    Handles captain assignments by inspecting both ``is_captain`` and
-    ``is_vice_captain`` flags. If the chosen captain ends up on the bench
-    (``position`` > 11) the vice captain is awarded the armband and their
-    points are recorded instead.
-    """
-    picks_data = get_gameweek_picks(manager_id, gameweek)
-    picks = picks_data["picks"]
-    manager_points = picks_data["entry_history"]["points"] - picks_data["entry_history"]["event_transfers_cost"]
-    bench_points = picks_data["entry_history"]["points_on_bench"]
-    transfers_made = picks_data["entry_history"]["event_transfers"]
-    chip = picks_data.get("active_chip") or "None"
-
-    for position in standings:
-        if position["entry"] == manager_id:
-            rank = position["rank"]
-            previous_rank = position["last_rank"]
-            league_points = position["total"]
-            total_points = position["points_for"]
-            break
-
-    player_points = []
-    bench_player_points = []
-    # track captain and vice captain details
-    captain_info = None
-    vice_info = None
-
-    for pick in picks:
-        name = player_name_lookup[pick["element"]]
-        points = player_points_lookup[pick["element"]]
-        player_gameweek = {
-            "name": name,
-            "points": points
-        }
-        # remember who was chosen as captain/vice so we can handle bench swaps
-        if pick.get("is_captain"):
-            captain_info = {"name": name, "points": points, "position": pick["position"]}
-        if pick.get("is_vice_captain"):
-            vice_info = {"name": name, "points": points, "position": pick["position"]}
-
-        # Skip bench players unless Bench Boost chip is active
-        if pick["position"] > 11 and chip != "bboost":
-            bench_player_points.append(player_gameweek)
-            continue
-        else:
-            player_points.append(player_gameweek)
-
-    # decide who actually wore the armband: if the captain is benched, vice steps up
-    if captain_info:
-        if captain_info["position"] > 11:
-            # original captain is benched, check if vice can take over
-            if vice_info and vice_info["position"] <= 11:
-                player_captain = vice_info["name"] + " (vice captain)"
-                captain_points = vice_info["points"]
-            else:
-                # both benched or no vice captain available
-                player_captain = "None"
-                captain_points = 0
-        else:
-            # captain is playing
-            player_captain = captain_info["name"]
-            captain_points = captain_info["points"]
-    else:
-        player_captain = "None"
-        captain_points = 0
-
-    top_players = sorted(player_points, key=lambda x: x['points'], reverse=True)[:3]
-    bottom_players = sorted(player_points, key=lambda x: x["points"])[:3]
-
-    team_bio = st.session_state.bios.get(str(manager_id), "No bio available.")
-
-    return {
-        "manager_id": manager_id,
-        "manager_points": manager_points,
-        "bench_points": bench_points,
-        "league_rank": rank,
-        "previous_league_rank": previous_rank,
-        "overall_league_points": league_points,
-        "overall_fpl_points": total_points,
-        "chip_used": chip,
-        "number_of_transfers": transfers_made,
-        "top_scoring_players": top_players,
-        "lowest_scoring_players": bottom_players,
-        "bench_player_points": bench_player_points,
-        "captain": player_captain,
-        "captain_points": captain_points,
-        "team_name": team_bio['team_name'],
-        "manager": team_bio['manager'],
-        "number_of_league_titles": team_bio['league_wins'],
-        "background": team_bio['bio']
-    }
-
-
 # Run pipeline button
 if st.button("🚀 Run Pipeline", type="primary", use_container_width=True):
     with st.status("Running pipeline...", expanded=True) as status:
         try:
+            start_run()  # This session's own counters; other sessions' runs carry on
             st.write("Loading data from API...")
-            
-            # Load player data for name lookups
-            player_data = get_player_data()
-            if not player_data:
-                st.error("Failed to load player data from API.")
-                st.stop()
-            
-            st.write("✓ Player data loaded successfully")
-            players = player_data["elements"]
-            player_name_lookup = {p["id"]: p["web_name"] for p in players}
-            player_points_lookup = {p["id"]: p["event_points"] for p in players}
-
-            # Fetch league data
-            st.write("Loading league standings...")
-            standings_data = get_h2h_league_standings(h2h_league_id)
-            if not standings_data:
-                st.error("Failed to load league standings from API.")
-                st.stop()
-            
-            st.write("✓ League standings loaded successfully")
-            standings = standings_data["standings"]["results"]
-            
-            st.write("Loading league matches...")
-            matches_data = get_h2h_league_matches(h2h_league_id)
-            if not matches_data:
-                st.error("Failed to load league matches from API.")
-                st.stop()
-            
-            st.write("✓ League matches loaded successfully")
-            fixtures = matches_data["results"]
-
-            st.write("Finished loading data from API.\n")
-
-            match_reports = []
-            match_num = 0
-
-            st.write("Processing matches...")
-            progress_bar = st.progress(0)
-            
-            for match in fixtures:
-                if match["event"] != latest_gameweek:
-                    continue
-                
-                match_num += 1
-                st.write(f"Processing Match {match_num}...")
-                
-                team_1_id = match["entry_1_entry"]
-                team_2_id = match["entry_2_entry"]
-                team_1_name = match["entry_1_name"]
-                team_2_name = match["entry_2_name"]
-
-                if team_1_name != "AVERAGE" and team_2_name != "AVERAGE":
-                    st.write(f"  → {team_1_name} vs {team_2_name}")
-                    team_1 = extract_match_summary(team_1_id, gameweek=latest_gameweek, 
-                                                   player_name_lookup=player_name_lookup,
-                                                   player_points_lookup=player_points_lookup,
-                                                   standings=standings)
-                    team_2 = extract_match_summary(team_2_id, gameweek=latest_gameweek,
-                                                   player_name_lookup=player_name_lookup,
-                                                   player_points_lookup=player_points_lookup,
-                                                   standings=standings)
-
-                    match_reports.append({
-                        "match": match_num,
-                        "team_1": {**team_1, "name": team_1_name},
-                        "team_2": {**team_2, "name": team_2_name},
-                        "score": f"{team_1['manager_points']} - {team_2['manager_points']}",
-                    })
-                    
-                elif team_1_name == "AVERAGE":
-                    st.write(f"  → AVERAGE vs {team_2_name}")
-                    team_1 = get_average_standings(standings, match)
-                    team_2 = extract_match_summary(team_2_id, gameweek=latest_gameweek,
-                                                   player_name_lookup=player_name_lookup,
-                                                   player_points_lookup=player_points_lookup,
-                                                   standings=standings)
-
-                    match_reports.append({
-                        "match": match_num,
-                        "team_1": {**team_1, "name": team_1['background']['team_name']},
-                        "team_2": {**team_2, "name": team_2_name},
-                        "score": f"{match['entry_1_points']} - {team_2['manager_points']}",
-                    })
-                    
-                elif team_2_name == "AVERAGE":
-                    st.write(f"  → {team_1_name} vs AVERAGE")
-                    team_1 = extract_match_summary(team_1_id, gameweek=latest_gameweek,
-                                                   player_name_lookup=player_name_lookup,
-                                                   player_points_lookup=player_points_lookup,
-                                                   standings=standings)
-                    team_2 = get_average_standings(standings, match)
-
-                    match_reports.append({
-                        "match": match_num,
-                        "team_1": {**team_1, "name": team_1_name},
-                        "team_2": {**team_2, "name": team_2['background']['team_name']},
-                        "score": f"{team_1['manager_points']} - {match['entry_2_points']}",
-                    })
-                    
-                progress_bar.progress(match_num / max(1, len(fixtures)))
-
-            st.write(f"\n✓ All match reports processed ({match_num} matches)")
+            load_start = time.perf_counter()
+            match_progress = st.progress(0.0, text="Fetching picks...")
+            match_feed = st.empty()
+            finished_matches = []
+
+            # Reports arrive as each match's picks come in (only on a cache miss)
+            def show_match_progress(done, total, report):
+                match_progress.progress(done / max(total, 1), text=f"{done} of {total} matches ready")
+                finished_matches.append(
+                    f"Match {report['match']}: {report['team_1']['name']} "
+                    f"{report['score']} {report['team_2']['name']}"
+                )
+                match_feed.text("\n".join(finished_matches[-5:]))
+
+            # Load the model while the FPL data is fetched, so the summary
+            # doesn't wait for it
+            if generate_summary:
+                shared.ollama.preload(ollama_model)
+
+            # Reports precomputed by precompute.py are served without any API calls
+            artifact = load_artifact(int(h2h_league_id), int(latest_gameweek))
+            with METRICS.stage("data"):
+                if artifact:
+                    raw_reports = artifact["match_reports"]
+                else:
+                    raw_reports = shared.match_data(int(h2h_league_id), int(latest_gameweek),
+                                                  show_match_progress)
+                match_reports = apply_bios(raw_reports, st.session_state.bios)
+            match_progress.progress(1.0, text=f"{len(match_reports)} matches ready")
+            match_feed.empty()
+            if artifact:
+                st.write(f"✓ Loaded precomputed reports (version {artifact['manifest']['version']})")
+            st.write(
+                f"✓ All match reports processed ({len(match_reports)} matches, "
+                f"{time.perf_counter() - load_start:.1f}s)"
+            )
             st.write("\nGenerating summary prompt...")
 
             # Create prompt for LLM from markdown template and match reports
-            full_prompt = st.session_state.prompt_task
-            # Insert brutality level selected in sidebar
-            full_prompt += f"\nBrutality Level: {st.session_state.get('brutality_level', 3)}\n"
-            full_prompt += st.session_state.prompt_detail
-            full_prompt += f'\n{match_reports}\n'
+            with METRICS.stage("prompt"):
+                # Insert brutality level selected in sidebar
+                instructions = build_instructions(st.session_state.prompt_task, st.session_state.prompt_detail,
+                                                  st.session_state.get('brutality_level', 3))
+                full_prompt = instructions
+                full_prompt += f'\n{encode_match_reports(match_reports, prompt_token_budget or None)}\n'
 
-            st.write("✓ Full prompt generated.")
+            st.write(f"✓ Full prompt generated (~{count_tokens(full_prompt)} tokens).")
 
             status.update(label="Pipeline completed!", state="complete")
             
@@ -361,16 +239,106 @@ if st.button("🚀 Run Pipeline", type="primary", use_container_width=True):
             st.success(f"✅ Pipeline completed successfully for Gameweek {latest_gameweek}!")
             
             with st.expander("View Match Reports Summary"):
-                st.json(match_reports)
+                if len(match_reports) > MAX_JSON_MATCHES:
+                    st.caption(f"Showing the first {MAX_JSON_MATCHES} of {len(match_reports)} matches.")
+                    st.download_button(
+                        "Download all match reports (JSONL)",
+                        data="".join(json.dumps(report) + "\n" for report in match_reports),
+                        file_name=f"GW{latest_gameweek}_{h2h_league_id}_match_reports.jsonl",
+                        mime="application/jsonl",
+                    )
+                st.json(match_reports[:MAX_JSON_MATCHES])
             
             with st.expander("View Full Prompt", expanded=True):
                 st.text(full_prompt)
             
-            # Option to save
-            st.info("""
-            **Note:** The full LLM summary generation is currently commented out in the pipeline.
-            To generate and save match reports, uncomment the LLM query section in the code.
-            """)
+            # A precomputed summary is only reused if it was written from this exact prompt
+            mode = "per_match" if generation_mode == "Per match (parallel)" else "single"
+            precomputed_summary = None
+            if (artifact and artifact["summary"] is not None and not force_regenerate
+                    and artifact["prompt"] == full_prompt and artifact["manifest"].get("mode") == mode
+                    and (not generate_summary or artifact["manifest"].get("model") == ollama_model)):
+                precomputed_summary = artifact["summary"]
+
+            if precomputed_summary is not None:
+                st.subheader("📰 Gameweek Round-up")
+                st.markdown(precomputed_summary)
+                st.caption(
+                    f"Precomputed with {artifact['manifest'].get('model')} · "
+                    f"version {artifact['manifest']['version']}"
+                )
+            elif generate_summary and mode == "per_match":
+                st.subheader("📰 Gameweek Round-up")
+                os.makedirs("reports", exist_ok=True)
+                report_path = f"reports/GW{latest_gameweek}_Match_Report.md"
+                section_progress = st.progress(0.0, text="Writing match sections...")
+                finished_sections = []
+
+                def show_section_progress(index, text):
+                    finished_sections.append(index)
+                    section_progress.progress(
+                        len(finished_sections) / (len(match_reports) + 1),
+                        text=f"{len(finished_sections)} of {len(match_reports) + 1} sections written"
+                    )
+
+                with METRICS.stage("llm"):
+                    summary = generate_round_up(match_reports, instructions, model=ollama_model,
+                                                force=force_regenerate, on_section=show_section_progress)
+                save_output(summary, filename=report_path)
+                st.markdown(summary)
+                st.caption(f"Saved to {report_path}")
+            elif generate_summary:
+                st.subheader("📰 Gameweek Round-up")
+                summary_placeholder = st.empty()
+                llm_stats = {}
+                os.makedirs("reports", exist_ok=True)
+                report_path = f"reports/GW{latest_gameweek}_Match_Report.md"
+
+                # Render and save the summary token by token as Ollama generates it
+                summary = ""
+                with st.spinner(f"Waiting for {ollama_model}..."), METRICS.stage("llm"):
+                    summary_stream = stream_ollama(full_prompt, model=ollama_model, stats=llm_stats,
+                                                   force=force_regenerate)
+                    for chunk in tee_to_file(summary_stream, report_path):
+                        summary += chunk
+                        summary_placeholder.markdown(summary + "▌")
+                summary_placeholder.markdown(summary)
+
+                if llm_stats.get("cached"):
+                    st.caption(f"Served from the summary cache · saved to {report_path}")
+                else:
+                    st.caption(
+                        f"Time to first token: {llm_stats.get('time_to_first_token', 0):.1f}s "
+                        f"(model load {llm_stats.get('load_time', 0):.1f}s) · "
+                        f"{llm_stats.get('tokens_per_second', 0):.1f} tokens/s · "
+                        f"total {llm_stats.get('total_time', 0):.1f}s · saved to {report_path}"
+                    )
+            else:
+                st.info("""
+                **Note:** Tick "Generate summary with Ollama" in the sidebar to stream a
+                round-up from a local model, or copy the prompt into an external LLM.
+                """)
+
+            # Timings and counters for this run (the data stage shows no requests
+            # when it was served from the app's cache)
+            with st.expander("⏱️ Run metrics"):
+                run_report = METRICS.snapshot()
+                metric_cols = st.columns(4)
+                metric_cols[0].metric("Total time", f"{run_report['total_seconds']:.2f}s")
+                metric_cols[1].metric("API requests", run_report["counters"]["http_requests"])
+                metric_cols[2].metric("Downloaded", f"{run_report['counters']['http_bytes'] / 1e6:.2f} MB")
+                metric_cols[3].metric(
+                    "Cache hits / misses",
+                    f"{run_report['counters']['cache_hits']} / {run_report['counters']['cache_misses']}"
+                )
+                st.write("**Stage timings (s)**")
+                st.table({"stage": list(run_report["stages"]), "seconds": list(run_report["stages"].values())})
+                if run_report["llm"]:
+                    st.write(f"**LLM:** {run_report['llm'].get('tokens_per_second', 0):.1f} tokens/s")
+                st.download_button("Download run report (JSON)", METRICS.to_json(),
+                                   file_name=f"GW{latest_gameweek}_run_report.json")
+                st.download_button("Download run report (Prometheus)", METRICS.to_prometheus(),
+                                   file_name=f"GW{latest_gameweek}_run_report.prom")
 
         except Exception as e:
             status.update(label="Pipeline failed!", state="error")
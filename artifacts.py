@@ -0,0 +1,111 @@
+"""
+Versioned store of precomputed reports, written by ``precompute.py`` and read
+by ``app.py``.
+
+Each league and gameweek gets a directory ``reports/GW{gameweek}_{league_id}/``
+holding one ``v{n}/`` directory per run (``manifest.json``,
+``match_reports.json``, ``prompt.txt`` and, if generated, ``summary.md``) and
+a ``LATEST`` file naming the newest complete version. Versions are written to
+a temporary directory and renamed into place, so readers never see a
+half-written run.
+"""
+import json
+import os
+import tempfile
+import time
+
+ARTIFACT_DIR = os.environ.get("FPL_ARTIFACT_DIR", "reports")
+
+
+def artifact_dir(league_id, gameweek, root=None):
+    return os.path.join(root or ARTIFACT_DIR, f"GW{gameweek}_{league_id}")
+
+
+def latest_version(league_id, gameweek, root=None):
+    """Return the newest complete version number, or None if there isn't one."""
+    try:
+        with open(os.path.join(artifact_dir(league_id, gameweek, root), "LATEST")) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def save_artifact(league_id, gameweek, match_reports, prompt, summary=None, meta=None, root=None):
+    """
+    Write a new version of the reports for a league and gameweek and point
+    ``LATEST`` at it. ``match_reports`` should be the bio-free reports from
+    ``pipeline.load_match_data``. Returns the version number.
+    """
+    base = artifact_dir(league_id, gameweek, root)
+    os.makedirs(base, exist_ok=True)
+    version = (latest_version(league_id, gameweek, root) or 0) + 1
+    while os.path.exists(os.path.join(base, f"v{version}")):
+        version += 1
+
+    manifest = {
+        "league_id": league_id,
+        "gameweek": gameweek,
+        "version": version,
+        "created_at": time.time(),
+        "has_summary": summary is not None,
+        **(meta or {}),
+    }
+    staging = tempfile.mkdtemp(dir=base, prefix=".staging-")
+    with open(os.path.join(staging, "match_reports.json"), "w") as f:
+        json.dump(match_reports, f, indent=2)
+    with open(os.path.join(staging, "prompt.txt"), "w") as f:
+        f.write(prompt)
+    if summary is not None:
+        with open(os.path.join(staging, "summary.md"), "w") as f:
+            f.write(summary)
+    with open(os.path.join(staging, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(staging, os.path.join(base, f"v{version}"))
+
+    latest_tmp = os.path.join(base, ".LATEST.tmp")
+    with open(latest_tmp, "w") as f:
+        f.write(str(version))
+    os.replace(latest_tmp, os.path.join(base, "LATEST"))
+    return version
+
+
+def load_artifact(league_id, gameweek, version=None, root=None):
+    """
+    Return a stored run as a dict with ``manifest``, ``match_reports``,
+    ``prompt`` and ``summary`` (None if no summary was generated), or None if
+    nothing has been precomputed. Defaults to the latest version.
+    """
+    version = version or latest_version(league_id, gameweek, root)
+    if version is None:
+        return None
+    path = os.path.join(artifact_dir(league_id, gameweek, root), f"v{version}")
+    try:
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+        with open(os.path.join(path, "match_reports.json")) as f:
+            match_reports = json.load(f)
+        with open(os.path.join(path, "prompt.txt")) as f:
+            prompt = f.read()
+    except (OSError, ValueError):
+        return None
+    summary = None
+    if manifest.get("has_summary"):
+        with open(os.path.join(path, "summary.md")) as f:
+            summary = f.read()
+    return {"manifest": manifest, "match_reports": match_reports, "prompt": prompt, "summary": summary}
+
+
+def latest_artifact_gameweek(league_id, root=None):
+    """The highest gameweek with precomputed reports for a league, or None."""
+    suffix = f"_{league_id}"
+    gameweeks = []
+    try:
+        names = os.listdir(root or ARTIFACT_DIR)
+    except OSError:
+        return None
+    for name in names:
+        if name.startswith("GW") and name.endswith(suffix) and name[2:-len(suffix)].isdigit():
+            gameweek = int(name[2:-len(suffix)])
+            if latest_version(league_id, gameweek, root) is not None:
+                gameweeks.append(gameweek)
+    return max(gameweeks, default=None)
@@ -0,0 +1,122 @@
+"""
+Rebuild match reports for a range of past gameweeks in one run.
+
+Each gameweek's player points come from ``event/{gw}/live`` (bootstrap-static
+only knows the current event) and each finished gameweek's league table is
+rebuilt from the match results (see ``pipeline.load_gameweek_table``), so the
+reports match what was true at the time.
+Everything is also written to the local store (``store.py``).
+
+Usage:
+    python backfill.py --from-gw 1 --to-gw 24
+    python backfill.py --from-gw 1 --to-gw 38 --league-id 588094
+"""
+import argparse
+import json
+import os
+
+from analytics import SeasonMatrix, season_stats
+from metrics import ContextThreadPoolExecutor
+from ownership import add_ownership
+from pipeline import (
+    add_head_to_head,
+    build_match_reports,
+    build_prompt,
+    load_gameweek_table,
+    load_histories,
+    load_inputs,
+    load_transfers
+)
+from store import STORE
+from transfers import add_transfer_impact
+from utils import (
+    MAX_WORKERS,
+    get_h2h_league_matches,
+    get_fixture_entry_ids,
+    get_picks_for_gameweeks,
+    get_player_table
+)
+
+
+def run_backfill(league_id, gameweeks, bios, prompts, token_budget=None):
+    """Return a dict mapping each gameweek to its match reports and prompt."""
+    player_table = get_player_table()
+    if not len(player_table):
+        raise Exception("Failed to load player data from API.")
+    print("Player data loaded successfully.")
+
+    fixtures = get_h2h_league_matches(league_id)["results"]
+    print(f"League matches loaded successfully ({len(fixtures)} fixtures).")
+    # Stored first, so each gameweek's table is rebuilt from the store
+    STORE.record_players(player_table)
+    STORE.record_matches(league_id, fixtures)
+
+    # One live request per gameweek and one picks request per manager-gameweek,
+    # all issued together rather than gameweek by gameweek.
+    with ContextThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        tables = dict(zip(gameweeks, pool.map(lambda gw: load_gameweek_table(league_id, gw), gameweeks)))
+    print(f"Live points and tables loaded for {len(tables)} gameweeks.")
+
+    picks_by_gw = get_picks_for_gameweeks(
+        {gw: get_fixture_entry_ids(fixtures, gw) for gw in gameweeks}
+    )
+    print(f"Picks loaded for {sum(len(p) for p in picks_by_gw.values())} manager-gameweeks.")
+
+    # Histories cover the whole season, so one request per manager serves every gameweek
+    histories = load_histories(
+        (entry for picks in picks_by_gw.values() for entry in picks), max(gameweeks)
+    )
+    print(f"Season histories loaded for {len(histories)} managers.")
+
+    # Transfer lists cover the whole season too
+    transfers_by_entry = load_transfers(histories, max(gameweeks))
+    print(f"Transfers loaded for {len(transfers_by_entry)} managers.")
+
+    results = {}
+    for gw in gameweeks:
+        print(f"Building match reports for Gameweek {gw}...")
+        points, standings = tables[gw]
+        STORE.record_standings(league_id, gw, standings)
+        STORE.record_picks(gw, picks_by_gw[gw])
+        season = season_stats(SeasonMatrix(histories, gw), fixtures)
+        match_reports = add_head_to_head(build_match_reports(
+            fixtures, gw, player_table.names, points, standings, picks_by_gw[gw], bios, season
+        ), STORE, league_id, gw)
+        add_ownership(match_reports, picks_by_gw[gw], player_table.names, points)
+        add_transfer_impact(match_reports, transfers_by_entry, picks_by_gw[gw],
+                            player_table.names, points, gw)
+        results[gw] = {
+            "match_reports": match_reports,
+            "prompt": build_prompt(match_reports, prompts, token_budget),
+        }
+    return results
+
+
+def save_backfill(results, output_dir="reports"):
+    os.makedirs(output_dir, exist_ok=True)
+    for gw, result in results.items():
+        base = os.path.join(output_dir, f"GW{gw}")
+        with open(f"{base}_match_reports.json", "w") as f:
+            json.dump(result["match_reports"], f, indent=2)
+        with open(f"{base}_prompt.txt", "w") as f:
+            f.write(result["prompt"])
+    print(f"Saved reports for {len(results)} gameweeks to {output_dir}/")
+
+
+def main():
+    config, bios, prompts = load_inputs()
+
+    parser = argparse.ArgumentParser(description="Rebuild match reports for a range of gameweeks.")
+    parser.add_argument("--league-id", type=int, default=config["h2h_league_id"])
+    parser.add_argument("--from-gw", type=int, default=1)
+    parser.add_argument("--to-gw", type=int, default=config["latest_gameweek"])
+    parser.add_argument("--output-dir", default="reports")
+    args = parser.parse_args()
+
+    gameweeks = list(range(args.from_gw, args.to_gw + 1))
+    results = run_backfill(args.league_id, gameweeks, bios, prompts, config.get("prompt_token_budget"))
+    save_backfill(results, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Generate match reports for several H2H leagues in one run.
+
+Shared data is only fetched once: bootstrap-static is loaded a single time and
+picks are requested once per unique manager, however many of the leagues they
+play in.
+
+Usage:
+    python batch.py                      # leagues from config "h2h_league_ids"
+    python batch.py 588094 123456 --gameweek 24
+"""
+import argparse
+import json
+import os
+
+from analytics import SeasonMatrix, season_stats
+from ownership import add_ownership
+from pipeline import (
+    add_head_to_head,
+    build_match_reports,
+    build_prompt,
+    load_histories,
+    load_inputs,
+    load_gameweek_table,
+    load_league_results,
+    load_transfers
+)
+from store import STORE
+from transfers import add_transfer_impact
+from utils import (
+    get_h2h_league_matches_for_event,
+    get_gameweek_picks_batch,
+    get_fixture_entry_ids,
+    get_player_table
+)
+
+
+def run_batch(league_ids, gameweek, bios, prompts, token_budget=None):
+    """Return a dict mapping each league ID to its list of match reports and prompt."""
+    player_table = get_player_table()
+    if not len(player_table):
+        raise Exception("Failed to load player data from API.")
+    print("Player data loaded successfully.")
+
+    league_data = {}
+    entry_ids = []
+    for league_id in league_ids:
+        fixtures = get_h2h_league_matches_for_event(league_id, gameweek)["results"]
+        points, standings = load_gameweek_table(league_id, gameweek, size=2 * len(fixtures) or None)
+        league_data[league_id] = (points, standings, fixtures)
+        entry_ids.extend(get_fixture_entry_ids(fixtures, gameweek))
+        print(f"League {league_id}: {len(standings)} teams, {len(fixtures)} fixtures.")
+
+    # One picks request per unique manager across every league
+    picks_lookup = get_gameweek_picks_batch(entry_ids, gameweek)
+    print(f"Picks loaded for {len(picks_lookup)} unique managers "
+          f"({len(entry_ids)} league memberships).")
+
+    STORE.record_players(player_table)
+    STORE.record_picks(gameweek, picks_lookup)
+    season_matrix = SeasonMatrix(load_histories(picks_lookup, gameweek), gameweek)
+    transfers_by_entry = load_transfers(picks_lookup, gameweek)
+
+    results = {}
+    for league_id, (points, standings, fixtures) in league_data.items():
+        print(f"Building match reports for league {league_id}...")
+        STORE.record_standings(league_id, gameweek, standings)
+        STORE.record_matches(league_id, fixtures)
+        season = season_stats(season_matrix, load_league_results(league_id, gameweek))
+        match_reports = add_head_to_head(build_match_reports(
+            fixtures, gameweek, player_table.names, points, standings, picks_lookup, bios, season
+        ), STORE, league_id, gameweek)
+        add_ownership(match_reports, picks_lookup, player_table.names, points)
+        add_transfer_impact(match_reports, transfers_by_entry, picks_lookup,
+                            player_table.names, points, gameweek)
+        results[league_id] = {
+            "match_reports": match_reports,
+            "prompt": build_prompt(match_reports, prompts, token_budget),
+        }
+    return results
+
+
+def save_batch(results, gameweek, output_dir="reports"):
+    os.makedirs(output_dir, exist_ok=True)
+    for league_id, result in results.items():
+        base = os.path.join(output_dir, f"GW{gameweek}_{league_id}")
+        with open(f"{base}_match_reports.json", "w") as f:
+            json.dump(result["match_reports"], f, indent=2)
+        with open(f"{base}_prompt.txt", "w") as f:
+            f.write(result["prompt"])
+        print(f"Saved {base}_match_reports.json and {base}_prompt.txt")
+
+
+def main():
+    config, bios, prompts = load_inputs()
+
+    parser = argparse.ArgumentParser(description="Generate match reports for several H2H leagues.")
+    parser.add_argument("league_ids", nargs="*", type=int,
+                        help="H2H league IDs (defaults to h2h_league_ids, or h2h_league_id, in config.json)")
+    parser.add_argument("--gameweek", type=int, default=config["latest_gameweek"])
+    parser.add_argument("--output-dir", default="reports")
+    args = parser.parse_args()
+
+    league_ids = args.league_ids or config.get("h2h_league_ids") or [config["h2h_league_id"]]
+    results = run_batch(league_ids, args.gameweek, bios, prompts, config.get("prompt_token_budget"))
+    save_batch(results, args.gameweek, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+End-to-end benchmarks for the data stage against the local fake FPL API.
+
+For each league size a synthetic league is served with injected latency, and
+each stage of ``pipeline.py`` is timed from a cold cache. The Streamlit data
+path (``pipeline.load_match_data``, which the app memoizes) is then timed cold
+and warm. No live API calls are made, and the local store is a temporary file
+per league size, never ``fpl_store.sqlite3``.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --sizes 10 100 1000 10000 --latency-ms 50 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "mock_fpl_data"))
+
+# Time the pipeline, not the rate limiter meant for the real API
+os.environ["FPL_RATE_LIMIT"] = "0"
+
+import utils  # noqa: E402
+from analytics import SeasonMatrix, season_stats  # noqa: E402
+from cache import DiskCache  # noqa: E402
+from fake_api import running_server  # noqa: E402
+from ownership import add_ownership  # noqa: E402
+from pipeline import build_match_reports, load_match_data  # noqa: E402
+from pipeline_mock_data import SyntheticLeague  # noqa: E402
+from prompt_encoder import count_tokens, encode_match_reports  # noqa: E402
+from store import STORE  # noqa: E402
+from transfers import add_transfer_impact  # noqa: E402
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+@contextlib.contextmanager
+def timed(timings, stage):
+    start = time.perf_counter()
+    yield
+    timings[stage] = round(time.perf_counter() - start, 4)
+
+
+def bench_stages(league_id, gameweek):
+    """Time each pipeline stage in turn, as ``pipeline.main`` runs them."""
+    timings = {}
+    with timed(timings, "bootstrap"):
+        player_table = utils.get_player_table()
+    with timed(timings, "standings"):
+        standings = utils.get_league_standings(league_id, parallel=True)
+    with timed(timings, "matches"):
+        fixtures = utils.get_h2h_league_matches_for_event(league_id, gameweek)["results"]
+    with timed(timings, "picks"):
+        picks_lookup = utils.get_gameweek_picks_batch(utils.get_fixture_entry_ids(fixtures, gameweek), gameweek)
+    with timed(timings, "history"):
+        histories = utils.get_manager_history_batch(picks_lookup)
+        season = season_stats(SeasonMatrix(histories, gameweek), utils.get_h2h_league_matches(league_id)["results"])
+    with timed(timings, "match_reports"), contextlib.redirect_stdout(io.StringIO()):
+        match_reports = build_match_reports(
+            fixtures, gameweek, player_table.names, player_table.points, standings, picks_lookup, {}, season
+        )
+    with timed(timings, "ownership"):
+        add_ownership(match_reports, picks_lookup, player_table.names, player_table.points)
+    with timed(timings, "transfers"):
+        transfers_by_entry = utils.get_manager_transfers_batch(picks_lookup)
+        add_transfer_impact(match_reports, transfers_by_entry, picks_lookup,
+                            player_table.names, player_table.points, gameweek)
+    with timed(timings, "prompt"):
+        prompt = encode_match_reports(match_reports)
+    timings["prompt_tokens"] = count_tokens(prompt)
+    return timings
+
+
+def bench_size(num_entries, gameweek, latency_ms, cache_root):
+    league = SyntheticLeague(num_entries=num_entries, league_id=1, current_gw=gameweek)
+    league.standings()  # Build the synthetic season up front so it isn't timed
+
+    with running_server(league=league, latency_ms=latency_ms) as server:
+        utils.BASE_URL = server.base_url
+        utils.CACHE = DiskCache(os.path.join(cache_root, f"cache_{num_entries}"))
+        utils.clear_caches()
+        # Each size gets its own empty store; the connection reopens on first use
+        STORE.close()
+        STORE.path = os.path.join(cache_root, f"store_{num_entries}.sqlite3")
+
+        result = {"entries": num_entries, "stages": bench_stages(1, gameweek)}
+        result["requests"] = sum(server.request_counts.values())
+        result["bytes"] = server.bytes_sent
+
+        utils.clear_caches()
+        server.reset_counters()
+        data_path = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            with timed(data_path, "cold"):
+                load_match_data(1, gameweek)
+            cold_requests = sum(server.request_counts.values())
+            server.reset_counters()
+            with timed(data_path, "warm"):
+                load_match_data(1, gameweek)
+        data_path["cold_requests"] = cold_requests
+        data_path["warm_requests"] = sum(server.request_counts.values())
+        result["data_path"] = data_path
+    return result
+
+
+def print_results(results):
+    stages = list(results[0]["stages"])
+    header = ["entries"] + stages + ["requests", "MB", "data cold", "data warm", "warm reqs"]
+    print(" | ".join(f"{h:>12}" for h in header))
+    for r in results:
+        row = [r["entries"]] + [r["stages"][s] for s in stages] + [
+            r["requests"], round(r["bytes"] / 1e6, 2),
+            r["data_path"]["cold"], r["data_path"]["warm"], r["data_path"]["warm_requests"],
+        ]
+        print(" | ".join(f"{v:>12}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FPL data stage against a local fake API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--gameweek", type=int, default=24)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_root:
+        results = [bench_size(size, args.gameweek, args.latency_ms, cache_root) for size in args.sizes]
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"latency_ms": args.latency_ms, "gameweek": args.gameweek, "results": results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
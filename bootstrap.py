@@ -0,0 +1,164 @@
+import codecs
+import json
+import sys
+from array import array
+
+# Fields kept from each entry of the bootstrap-static "events" block
+EVENT_FIELDS = (
+    "id", "name", "deadline_time", "finished", "data_checked",
+    "is_previous", "is_current", "is_next", "average_entry_score", "highest_score",
+)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class PlayerTable:
+    """
+    Compact player lookup built from bootstrap-static.
+
+    ``names`` and ``points`` are dense sequences indexed directly by element
+    ID, so ``table.names[pick["element"]]`` works like the old dict lookups
+    while holding one interned string and one typed integer per player.
+    """
+
+    __slots__ = ("names", "points", "events")
+
+    def __init__(self, names, points, events):
+        self.names = names
+        self.points = points
+        self.events = events
+
+    def __len__(self):
+        return sum(1 for name in self.names if name is not None)
+
+    def finished_events(self):
+        return frozenset(
+            event["id"] for event in self.events
+            if event.get("finished") and event.get("data_checked")
+        )
+
+    def latest_gameweek(self):
+        gameweek = None
+        for event in self.events:
+            if event.get("is_previous", True):
+                gameweek = event.get("id")
+        return gameweek
+
+
+class _ChunkReader:
+    """Incremental text buffer over an iterable of byte chunks."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = None
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self):
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8")()
+            # Drop consumed text so the buffer only ever holds the current value
+            self.buf = self.buf[self.pos:] + self._decoder.decode(chunk)
+            self.pos = 0
+            return True
+        self.eof = True
+        return False
+
+    def skip_ws(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._more():
+                return
+
+    def peek(self):
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError("Unexpected end of bootstrap-static payload")
+        return self.buf[self.pos]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in bootstrap-static payload at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value, pulling in more chunks as needed."""
+        self.skip_ws()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            # A number that runs to the end of the buffer may still be truncated
+            if end == len(self.buf) and self.buf[end - 1].isdigit() and self._more():
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self):
+        """Yield each item of a JSON array one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def parse_bootstrap(chunks):
+    """
+    Build a PlayerTable from bootstrap-static, streaming through the payload.
+
+    Only ``id``, ``web_name`` and ``event_points`` are kept from each player
+    and only the fields in EVENT_FIELDS from each event. Everything else is
+    discarded as soon as it has been read.
+    """
+    reader = _ChunkReader(chunks)
+    names = []
+    points = array("h")
+    events = []
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return PlayerTable(names, points, events)
+
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "elements":
+            for player in reader.array_items():
+                element_id = player["id"]
+                if element_id >= len(names):
+                    grow = element_id + 1 - len(names)
+                    names.extend([None] * grow)
+                    points.extend([0] * grow)
+                names[element_id] = sys.intern(player["web_name"])
+                points[element_id] = player.get("event_points") or 0
+        elif key == "events":
+            for event in reader.array_items():
+                events.append({field: event.get(field) for field in EVENT_FIELDS})
+        else:
+            reader.value()
+
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        break
+
+    return PlayerTable(names, points, events)
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class DiskCache:
+    """
+    Small size-bounded on-disk cache.
+
+    Each entry is stored as a ``<key>.body`` file holding the raw bytes and a
+    ``<key>.json`` file holding its metadata. When the total size of the
+    bodies goes over ``max_bytes`` the least recently used entries are removed.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a stable key from any JSON-serialisable parts."""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    def get(self, key):
+        """Return ``(meta, body)`` for a key, or ``None`` if it isn't cached."""
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        # Mark as recently used for eviction purposes
+        try:
+            os.utime(body_path)
+        except OSError:
+            pass
+        return meta, body
+
+    def put(self, key, body, meta):
+        """Store raw bytes and metadata under a key, evicting old entries if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        body_path, meta_path = self._paths(key)
+        with self._lock:
+            self._ensure_total()
+            try:
+                self._total_bytes -= os.path.getsize(body_path)
+            except OSError:
+                pass
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+            self._total_bytes += len(body)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def update_meta(self, key, meta):
+        """Rewrite only the metadata of an existing entry (e.g. after a 304)."""
+        _, meta_path = self._paths(key)
+        with self._lock:
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def clear(self):
+        with self._lock:
+            for name in self._list_files():
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def _list_files(self):
+        try:
+            return os.listdir(self.directory)
+        except OSError:
+            return []
+
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _ensure_total(self):
+        if self._total_bytes is not None:
+            return
+        total = 0
+        for name in self._list_files():
+            if name.endswith(".body"):
+                try:
+                    total += os.path.getsize(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self._total_bytes = total
+
+    def _evict(self):
+        entries = []
+        for name in self._list_files():
+            if not name.endswith(".body"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Drop least recently used entries until we're back under 90% of the limit
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if self._total_bytes <= target:
+                break
+            for stale in (path, path[:-len(".body")] + ".json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+            self._total_bytes -= size
+
@@ -0,0 +1,126 @@
+"""
+Low-memory data stage for very large leagues.
+
+The regular pipeline holds the fixtures, every manager's picks, all the
+match reports and the prompt in memory at once. Here fixtures are streamed
+a page at a time: each page's picks are fetched, its match reports are
+appended to a JSONL file and the page is then dropped. Only
+the player table and the standings index are kept for the whole run, so
+peak memory stays flat as the league grows.
+
+Season stats and league-wide ownership need every manager at once and are
+left out; head-to-head records still come from the local store. Points and
+the table come from ``pipeline.load_gameweek_table``, as in the other modes.
+
+Usage:
+    python large_league.py --league-id 588094 --gameweek 24
+    python large_league.py --league-id 588094 --gameweek 24 --prompt
+"""
+import argparse
+import json
+import os
+
+from metrics import METRICS
+from pipeline import add_head_to_head, apply_bios, iter_match_reports, load_gameweek_table, load_inputs
+from prompt_encoder import encode_match, iter_bio_lines
+from store import STORE
+from utils import get_player_table, iter_h2h_league_matches_for_event
+
+
+def write_match_reports_jsonl(h2h_league_id, gameweek, path):
+    """
+    Build the bio-free match reports for a league and gameweek and write them
+    to ``path``, one JSON object per line in match order. Returns the number
+    of reports written.
+    """
+    with METRICS.stage("bootstrap"):
+        player_table = get_player_table()
+    with METRICS.stage("standings"):
+        points, standings = load_gameweek_table(h2h_league_id, gameweek)
+    if not len(standings):
+        raise Exception("Failed to load league standings from API.")
+    with METRICS.stage("store"):
+        STORE.record_players(player_table)
+        STORE.record_standings(h2h_league_id, gameweek, standings)
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    matches_seen = 0
+    with open(path + ".tmp", "w") as f:
+        for page in iter_h2h_league_matches_for_event(h2h_league_id, gameweek):
+            # Picks only live as long as their page
+            picks_lookup = {}
+            with METRICS.stage("match_reports"):
+                reports = sorted(iter_match_reports(page, gameweek, player_table.names, points,
+                                                    standings, {}, picks_lookup, first_match=matches_seen + 1),
+                                 key=lambda report: report["match"])
+                add_head_to_head(reports, STORE, h2h_league_id, gameweek)
+            for report in reports:
+                f.write(json.dumps(report) + "\n")
+            written += len(reports)
+            with METRICS.stage("store"):
+                STORE.record_matches(h2h_league_id, page)
+                STORE.record_picks(gameweek, picks_lookup)
+            matches_seen += len(page)
+            print(f"{matches_seen} matches processed...")
+    os.replace(path + ".tmp", path)
+    return written
+
+
+def read_match_reports_jsonl(path):
+    """Yield the match reports in a JSONL file one at a time."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_prompt(reports_path, prompt_path, intro, outro="", bios=None):
+    """
+    Write the prompt for a JSONL file of match reports without loading them
+    all: one pass over the file for the team bios and one for the matches.
+    The output matches ``pipeline.build_prompt`` with no token budget;
+    trimming to a budget needs every report at once.
+    """
+    def reports():
+        for report in read_match_reports_jsonl(reports_path):
+            yield apply_bios([report], bios or {})[0]
+
+    with open(prompt_path, "w") as f:
+        f.write(intro + "\n")
+        for index, line in enumerate(iter_bio_lines(reports())):
+            f.write(("\n" if index else "") + line)
+        f.write("\n\nMATCHES\n")
+        for index, report in enumerate(reports()):
+            f.write(("\n" if index else "") + encode_match(report))
+        f.write("\n" + outro)
+
+
+def main():
+    config, bios, prompts = load_inputs()
+
+    parser = argparse.ArgumentParser(description="Build match reports for a very large league with flat memory use.")
+    parser.add_argument("--league-id", type=int, default=config["h2h_league_id"])
+    parser.add_argument("--gameweek", type=int, default=config["latest_gameweek"])
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--prompt", action="store_true", help="Also write the prompt from the JSONL file")
+    args = parser.parse_args()
+
+    METRICS.reset()
+    reports_path = os.path.join(args.output_dir, f"GW{args.gameweek}_{args.league_id}_match_reports.jsonl")
+    count = write_match_reports_jsonl(args.league_id, args.gameweek, reports_path)
+    print(f"{count} match reports saved as {reports_path}")
+
+    if args.prompt:
+        # Named apart from batch.py's GW{gw}_{league}_prompt.txt, so neither overwrites the other
+        prompt_path = os.path.join(args.output_dir, f"GW{args.gameweek}_{args.league_id}_jsonl_prompt.txt")
+        with METRICS.stage("prompt"):
+            write_prompt(reports_path, prompt_path, prompts["intro"], prompts["outro"], bios)
+        print(f"Prompt saved as {prompt_path}")
+
+    METRICS.save(os.path.join(args.output_dir, f"GW{args.gameweek}_run_report"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Live gameweek mode: keep match reports and H2H scores up to date while a
+gameweek is in progress.
+
+``LiveGameweek.start()`` runs the data stage once. Each ``refresh()`` then
+polls ``event/{gw}/live`` (a single conditional request), finds the players
+whose points changed and rebuilds only the teams that picked one of them,
+reusing the picks already fetched. Match reports are patched in place. The
+AVERAGE team scores the mean of the league's live scores, rounded like the
+API, and is recomputed whenever one of them changes.
+
+Usage:
+    python live.py                       # league and gameweek from config
+    python live.py --league-id 588094 --gameweek 24 --interval 60
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from pipeline import apply_bios, build_match_reports, extract_match_summary, load_gameweek_table, load_inputs
+from utils import (
+    get_event_points,
+    get_fixture_entry_ids,
+    get_gameweek_picks_batch,
+    get_h2h_league_matches_for_event,
+    get_player_table,
+)
+
+
+def live_points(picks_data, points):
+    """A manager's live score: each pick's points times its multiplier, less transfer hits."""
+    total = sum(points[pick["element"]] * pick["multiplier"] for pick in picks_data["picks"])
+    return total - picks_data["entry_history"]["event_transfers_cost"]
+
+
+class LiveGameweek:
+    def __init__(self, h2h_league_id, gameweek):
+        self.h2h_league_id = h2h_league_id
+        self.gameweek = gameweek
+        self.match_reports = []
+        self.names = None
+        self.points = None
+        self.standings = None
+        self.picks_lookup = {}
+        self.average = None  # The AVERAGE team's score, if the league has one
+        self._by_element = defaultdict(set)  # Element ID -> managers who picked that player
+        self._teams = {}  # Manager ID -> (match report, side)
+        self._average_sides = []  # (match report, side) for each AVERAGE team
+
+    def start(self):
+        """Fetch everything once and build the initial match reports."""
+        player_table = get_player_table()
+        self.names = player_table.names
+        fixtures = get_h2h_league_matches_for_event(self.h2h_league_id, self.gameweek)["results"]
+        self.points, self.standings = load_gameweek_table(
+            self.h2h_league_id, self.gameweek, size=2 * len(fixtures) or None, ttl=0
+        )
+        self.picks_lookup = get_gameweek_picks_batch(get_fixture_entry_ids(fixtures, self.gameweek), self.gameweek)
+
+        self.match_reports = build_match_reports(
+            fixtures, self.gameweek, self.names, self.points, self.standings, self.picks_lookup, {}
+        )
+        for report in self.match_reports:
+            for side in ("team_1", "team_2"):
+                manager_id = report[side].get("manager_id")
+                if manager_id is None:
+                    self._average_sides.append((report, side))
+                    continue
+                self._teams[manager_id] = (report, side)
+                for pick in self.picks_lookup[manager_id]["picks"]:
+                    self._by_element[pick["element"]].add(manager_id)
+
+        # Picks may have been cached before the latest points came in
+        self._rebuild(self._teams)
+        self._update_average()
+        return self.match_reports
+
+    def refresh(self):
+        """
+        Poll live points and patch the affected teams and scores.
+        Returns the set of manager IDs that were recomputed.
+        """
+        old = np.asarray(self.points)
+        new = get_event_points(self.gameweek, len(self.names), ttl=0)
+        self.points = new
+
+        # The new array can only be longer (it is padded to the player table)
+        new_array = np.asarray(new)
+        old = np.pad(old, (0, len(new_array) - len(old))) if len(old) < len(new_array) else old
+        affected = set()
+        for element in np.flatnonzero(new_array != old[:len(new_array)]):
+            affected |= self._by_element.get(int(element), set())
+        self._rebuild(affected)
+        if affected:
+            self._update_average()
+        return affected
+
+    def _update_average(self):
+        """Set the AVERAGE team's score to the mean of the league's live scores."""
+        if not self._average_sides or not self._teams:
+            return
+        scores = [report[side]["manager_points"] for report, side in self._teams.values()]
+        average = round(sum(scores) / len(scores))
+        if average == self.average:
+            return
+        self.average = average
+        for report, side in self._average_sides:
+            report[side]["manager_points"] = average
+            report["score"] = f"{report['team_1']['manager_points']} - {report['team_2']['manager_points']}"
+
+    def _rebuild(self, manager_ids):
+        reports = {}
+        for manager_id in manager_ids:
+            report, side = self._teams[manager_id]
+            team = extract_match_summary(
+                manager_id, self.gameweek, self.names, self.points, self.standings, self.picks_lookup, {}
+            )
+            team["manager_points"] = live_points(self.picks_lookup[manager_id], self.points)
+            team["bench_points"] = sum(player["points"] for player in team["bench_player_points"])
+            report[side].update(team)
+            reports[id(report)] = report
+
+        for report in reports.values():
+            report["score"] = f"{report['team_1']['manager_points']} - {report['team_2']['manager_points']}"
+
+    def scores(self):
+        """Current H2H scores as ``{match number: "points - points"}``."""
+        return {report["match"]: report["score"] for report in self.match_reports}
+
+
+def main():
+    config, bios, prompts = load_inputs()
+
+    parser = argparse.ArgumentParser(description="Follow a live gameweek, updating scores as points change.")
+    parser.add_argument("--league-id", type=int, default=config["h2h_league_id"])
+    parser.add_argument("--gameweek", type=int, default=config["latest_gameweek"])
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between refreshes")
+    parser.add_argument("--output-dir", default="reports")
+    args = parser.parse_args()
+
+    live = LiveGameweek(args.league_id, args.gameweek)
+    live.start()
+    os.makedirs(args.output_dir, exist_ok=True)
+    filename = os.path.join(args.output_dir, f"GW{args.gameweek}_live_match_reports.json")
+
+    previous = {}
+    try:
+        while True:
+            scores = live.scores()
+            for report in live.match_reports:
+                if previous.get(report["match"]) != report["score"]:
+                    print(f"Match {report['match']}: {report['team_1']['name']} "
+                          f"{report['score']} {report['team_2']['name']}")
+            previous = scores
+            with open(filename, "w") as f:
+                json.dump(apply_bios(live.match_reports, bios), f, indent=2)
+
+            time.sleep(args.interval)
+            affected = live.refresh()
+            print(f"[{time.strftime('%H:%M:%S')}] {len(affected)} teams updated")
+    except KeyboardInterrupt:
+        print(f"Live match reports saved as {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,240 @@
+import json
+import os
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from cache import DiskCache
+from metrics import METRICS
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+# How long Ollama keeps a model loaded after each request; long enough to
+# cover a whole report run so later calls never pay the load time again
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Generated summaries keyed by a hash of (model, prompt, options), so an
+# identical request is answered from disk instead of re-running inference.
+LLM_CACHE = DiskCache(
+    os.environ.get("LLM_CACHE_DIR", ".llm_cache"),
+    max_bytes=int(os.environ.get("LLM_CACHE_MAX_MB", "50")) * 1024 * 1024,
+)
+
+
+def _cache_key(prompt, model, options):
+    return DiskCache.make_key("generate", model, prompt, options or {})
+
+def _cached_response(key, force):
+    if force:
+        return None
+    cached = LLM_CACHE.get(key)
+    return cached[1].decode("utf-8") if cached else None
+
+def _store_response(key, text, model):
+    LLM_CACHE.put(key, text.encode("utf-8"), {"model": model, "created_at": time.time()})
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
 
-def query_ollama(prompt: str, model: str = "llama3"):
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={
+
+class OllamaClient:
+    """
+    Ollama client holding one pooled keep-alive session.
+
+    Every request asks Ollama to keep the model loaded for ``keep_alive``,
+    and ``num_ctx`` / ``num_thread`` (when set) are sent as default model
+    options. ``preload`` loads a model in a background thread so the load
+    overlaps with other work, such as the FPL data fetch.
+    """
+
+    def __init__(self, host=OLLAMA_HOST, keep_alive=OLLAMA_KEEP_ALIVE, num_ctx=None, num_thread=None,
+                 pool_size=4):
+        self.host = host.rstrip("/")
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.num_thread = num_thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._preloads = {}  # model -> thread loading it
+
+    @property
+    def generate_url(self):
+        return f"{self.host}/api/generate"
+
+    def options(self, options=None):
+        """The configured ``num_ctx`` / ``num_thread`` overridden by ``options``."""
+        defaults = {"num_ctx": self.num_ctx, "num_thread": self.num_thread}
+        merged = {name: value for name, value in defaults.items() if value is not None}
+        merged.update(options or {})
+        return merged or None
+
+    def request_body(self, prompt, model, options, stream):
+        body = {
             "model": model,
             "prompt": prompt,
-            "stream": False
+            "stream": stream,
+            "keep_alive": self.keep_alive,
         }
-    )
-    response.raise_for_status()
-    return response.json()["response"]
+        if options:
+            body["options"] = options
+        return body
+
+    def warm_up(self, model):
+        """
+        Load ``model`` into memory (a generate request with no prompt) and
+        keep it there for ``keep_alive``. Returns the load time in seconds.
+        """
+        body = {"model": model, "keep_alive": self.keep_alive}
+        options = self.options()
+        if options:
+            body["options"] = options  # Loading with a different num_ctx would reload it later
+        start = time.perf_counter()
+        response = self.session.post(self.generate_url, json=body)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    def preload(self, model):
+        """
+        Start warming ``model`` up in a background thread, unless that is
+        already under way. Failures (e.g. Ollama not running) are printed
+        and otherwise ignored; the first real request will surface them.
+        """
+        def load():
+            try:
+                print(f"Loaded {model} in {self.warm_up(model):.1f}s")
+            except requests.RequestException as e:
+                print(f"Could not preload {model}: {e}")
 
-def save_output(text: str, filename: str = "gameweek_summary.md"):
+        with self._lock:
+            thread = self._preloads.get(model)
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(target=load, name=f"ollama-preload-{model}", daemon=True)
+                self._preloads[model] = thread
+                thread.start()
+        return thread
+
+    def release(self, model):
+        """Ask Ollama to unload ``model`` now instead of when ``keep_alive`` runs out."""
+        self.session.post(self.generate_url, json={"model": model, "keep_alive": 0}).raise_for_status()
+
+    def generate(self, prompt, model, options=None):
+        response = self.session.post(self.generate_url, json=self.request_body(prompt, model, options, stream=False))
+        response.raise_for_status()
+        return response.json()
+
+    def generate_stream(self, prompt, model, options=None):
+        return self.session.post(self.generate_url, json=self.request_body(prompt, model, options, stream=True),
+                                 stream=True)
+
+
+# Process-wide client; the app and the CLIs preload their model through it
+OLLAMA = OllamaClient(num_ctx=_env_int("OLLAMA_NUM_CTX"), num_thread=_env_int("OLLAMA_NUM_THREAD"))
+
+
+def query_ollama(prompt: str, model: str = "llama3", options: dict = None, force: bool = False,
+                 client: OllamaClient = None):
+    """
+    Generate a summary with Ollama. Identical requests (same prompt, model and
+    options) are served from the on-disk cache unless ``force`` is set.
+    """
+    client = client or OLLAMA
+    options = client.options(options)
+    key = _cache_key(prompt, model, options)
+    cached = _cached_response(key, force)
+    if cached is not None:
+        METRICS.record_llm({"cached": True})
+        return cached
+
+    start = time.perf_counter()
+    data = client.generate(prompt, model, options)
+    eval_duration = data.get("eval_duration", 0)  # nanoseconds
+    METRICS.record_llm({
+        "total_time": time.perf_counter() - start,
+        "load_time": data.get("load_duration", 0) / 1e9,
+        "eval_count": data.get("eval_count", 0),
+        "tokens_per_second": data.get("eval_count", 0) / (eval_duration / 1e9) if eval_duration else 0.0,
+    })
+    text = data["response"]
+    _store_response(key, text, model)
+    return text
+
+def stream_ollama(prompt: str, model: str = "llama3", stats: dict = None,
+                  options: dict = None, force: bool = False, client: OllamaClient = None):
+    """
+    Yield the generated text piece by piece as Ollama produces it.
+
+    Ollama streams newline-delimited JSON chunks; each carries a fragment of
+    the response and the last one (``"done": true``) carries the token counts.
+    If ``stats`` is given it is filled with ``time_to_first_token`` and
+    ``total_time`` (seconds), ``load_time`` (seconds spent loading the model),
+    ``eval_count``, ``tokens_per_second`` and ``cached``. Cached responses are yielded in one go unless ``force`` is set;
+    a response is only cached once generation has finished.
+    """
+    stats = stats if stats is not None else {}
+    start = time.perf_counter()
+    client = client or OLLAMA
+    options = client.options(options)
+    key = _cache_key(prompt, model, options)
+    cached = _cached_response(key, force)
+    stats["cached"] = cached is not None
+    if cached is not None:
+        stats["time_to_first_token"] = stats["total_time"] = time.perf_counter() - start
+        stats["eval_count"] = 0
+        stats["tokens_per_second"] = 0.0
+        METRICS.record_llm(stats)
+        yield cached
+        return
+
+    parts = []
+    with client.generate_stream(prompt, model, options) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise RuntimeError(f"Ollama error: {chunk['error']}")
+
+            text = chunk.get("response", "")
+            if text:
+                if "time_to_first_token" not in stats:
+                    stats["time_to_first_token"] = time.perf_counter() - start
+                parts.append(text)
+                yield text
+
+            if chunk.get("done"):
+                eval_count = chunk.get("eval_count", 0)
+                eval_duration = chunk.get("eval_duration", 0)  # nanoseconds
+                stats["load_time"] = chunk.get("load_duration", 0) / 1e9
+                stats["eval_count"] = eval_count
+                stats["tokens_per_second"] = eval_count / (eval_duration / 1e9) if eval_duration else 0.0
+                _store_response(key, "".join(parts), model)
+                break
+
+    stats["total_time"] = time.perf_counter() - start
+    METRICS.record_llm(stats)
+
+def tee_to_file(chunks, filename: str = "gameweek_summary.md"):
+    """Write text chunks to a file as they arrive while passing them through."""
     with open(filename, "w") as f:
-        f.write(text)
\ No newline at end of file
+        for chunk in chunks:
+            f.write(chunk)
+            f.flush()
+            yield chunk
+
+def save_output(text, filename: str = "gameweek_summary.md"):
+    """
+    Save a summary to file. ``text`` can be a string or an iterable of chunks
+    (e.g. from ``stream_ollama``), which is written progressively. Returns the
+    full text.
+    """
+    if isinstance(text, str):
+        with open(filename, "w") as f:
+            f.write(text)
+        return text
+    return "".join(tee_to_file(text, filename))
@@ -0,0 +1,140 @@
+"""
+Run instrumentation: wall time per stage, HTTP and cache counters and LLM
+throughput, exported as a JSON run report or Prometheus text format.
+
+``METRICS`` is what ``utils.py``, ``llm_summary.py`` and the pipeline record
+into. It forwards to the metrics of the run in progress in the current
+context, so runs in different app sessions don't mix their numbers: call
+``start_run()`` at the start of a run. Outside a run it forwards to one
+process-wide instance, which CLI scripts clear with ``METRICS.reset()``.
+Work handed to threads keeps its run if submitted through
+``ContextThreadPoolExecutor``.
+"""
+import contextvars
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Counter names and their Prometheus help text
+COUNTERS = {
+    "http_requests": "HTTP requests sent to the FPL API",
+    "http_bytes": "Response bytes downloaded from the FPL API",
+    "http_retry": "FPL API requests retried after a 429, 5xx, timeout or connection error",
+    "http_throttled": "FPL API responses with status 429 (rate limited)",
+    "cache_hits": "API responses served from the on-disk cache without a request",
+    "cache_revalidated": "Cached API responses confirmed unchanged by a 304",
+    "cache_misses": "API responses that had to be downloaded",
+    "llm_requests": "Requests sent to the LLM",
+    "llm_cache_hits": "LLM outputs served from the summary cache",
+}
+
+
+class RunMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = {}
+            self.counters = Counter()
+            self.llm = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work; repeated stages with the same name add up."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def record_llm(self, stats):
+        """Record generation stats as filled in by ``llm_summary.stream_ollama``."""
+        with self._lock:
+            self.counters["llm_cache_hits" if stats.get("cached") else "llm_requests"] += 1
+            if not stats.get("cached"):
+                self.llm = {
+                    key: stats[key] for key in
+                    ("time_to_first_token", "total_time", "load_time", "eval_count", "tokens_per_second")
+                    if key in stats
+                }
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "total_seconds": round(time.time() - self.started_at, 4),
+                "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+                "counters": {name: self.counters.get(name, 0) for name in COUNTERS},
+                "llm": dict(self.llm),
+            }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        report = self.snapshot()
+        lines = [
+            "# HELP fpl_stage_seconds Wall time spent in each pipeline stage",
+            "# TYPE fpl_stage_seconds gauge",
+        ]
+        lines += [f'fpl_stage_seconds{{stage="{name}"}} {seconds}' for name, seconds in report["stages"].items()]
+        for name, help_text in COUNTERS.items():
+            lines += [
+                f"# HELP fpl_{name}_total {help_text}",
+                f"# TYPE fpl_{name}_total counter",
+                f"fpl_{name}_total {report['counters'][name]}",
+            ]
+        for name, value in report["llm"].items():
+            unit = "_seconds" if name.endswith("time") or name.endswith("token") else ""
+            lines += [f"# TYPE fpl_llm_{name}{unit} gauge", f"fpl_llm_{name}{unit} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def save(self, base_path):
+        """Write ``<base_path>.json`` and ``<base_path>.prom``."""
+        with open(f"{base_path}.json", "w") as f:
+            f.write(self.to_json())
+        with open(f"{base_path}.prom", "w") as f:
+            f.write(self.to_prometheus())
+
+
+_current_run = contextvars.ContextVar("run_metrics", default=None)
+_process_metrics = RunMetrics()
+
+
+class _CurrentRunMetrics:
+    """Forwards to the current context's run metrics (see ``start_run``)."""
+
+    def __getattr__(self, name):
+        return getattr(_current_run.get() or _process_metrics, name)
+
+
+METRICS = _CurrentRunMetrics()
+
+
+def start_run():
+    """
+    Give the current context (e.g. one app session's script run) fresh
+    metrics and return them. Runs in progress elsewhere are unaffected.
+    """
+    metrics = RunMetrics()
+    _current_run.set(metrics)
+    return metrics
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool whose tasks run in a copy of the submitter's context, and so record into its run."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
@@ -0,0 +1,188 @@
+"""
+Local stand-in for the FPL API.
+
+Serves every endpoint used in ``utils.py`` from recorded responses and/or a
+``SyntheticLeague``, with configurable latency, ETag support and per-endpoint
+request counters. Point the app or pipeline at it with ``FPL_API_BASE_URL``:
+
+    python mock_fpl_data/fake_api.py --entries 1000 --latency-ms 80
+    python mock_fpl_data/fake_api.py --entries 1000 --throttle-rate 0.1 --error-rate 0.05
+    FPL_API_BASE_URL=http://127.0.0.1:8001/api python pipeline.py
+
+Recorded responses are plain JSON files named by ``recording_filename``.
+Use ``--record-from https://fantasy.premierleague.com/api`` to proxy requests
+that aren't recorded yet to the real API and save what comes back.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from pipeline_mock_data import SyntheticLeague, recording_filename  # noqa: E402
+
+API_PREFIX = "/api"
+
+
+class FakeFPLServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, league=None, recordings_dir=None, record_from=None,
+                 latency_ms=0.0, jitter_ms=0.0, throttle_rate=0.0, error_rate=0.0):
+        super().__init__(address, _Handler)
+        self.league = league
+        self.recordings_dir = recordings_dir
+        self.record_from = record_from
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Fraction of requests answered with a 429 / 503 to exercise retries
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.request_counts = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_counts.clear()
+            self.bytes_sent = 0
+
+    def lookup(self, path, query):
+        """Return the JSON body for a request, or None if nothing can answer it."""
+        if self.recordings_dir:
+            recorded = os.path.join(self.recordings_dir, recording_filename(path, query))
+            if os.path.exists(recorded):
+                with open(recorded) as f:
+                    return json.load(f)
+        if self.league:
+            body = self.league.response(path, query)
+            if body is not None:
+                return body
+        if self.record_from:
+            resp = requests.get(self.record_from + path, params=query, timeout=30)
+            if resp.ok:
+                body = resp.json()
+                if self.recordings_dir:
+                    os.makedirs(self.recordings_dir, exist_ok=True)
+                    with open(os.path.join(self.recordings_dir, recording_filename(path, query)), "w") as f:
+                        json.dump(body, f)
+                return body
+        return None
+
+
+def _endpoint_name(path):
+    """Collapse IDs out of a path so counters group by endpoint."""
+    return "/".join("{id}" if part.isdigit() else part for part in path.strip("/").split("/"))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        query = dict(parse_qsl(url.query))
+
+        delay = server.latency_ms + random.uniform(0, server.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+        with server._lock:
+            server.request_counts[_endpoint_name(path)] += 1
+        roll = random.random()
+        if roll < server.throttle_rate:
+            self._send(429, b'{"detail": "Rate limited."}', headers={"Retry-After": "0"})
+            return
+        if roll < server.throttle_rate + server.error_rate:
+            self._send(503, b'{"detail": "Service unavailable."}')
+            return
+
+        body = server.lookup(path, query)
+        if body is None:
+            self._send(404, b'{"detail": "Not found."}')
+            return
+
+        payload = json.dumps(body).encode("utf-8")
+        etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", {"ETag": etag})
+            return
+        self._send(200, payload, {"ETag": etag})
+
+    def _send(self, status, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        with self.server._lock:
+            self.server.bytes_sent += len(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def running_server(league=None, recordings_dir=None, latency_ms=0.0, jitter_ms=0.0, port=0,
+                   throttle_rate=0.0, error_rate=0.0):
+    """Run a FakeFPLServer on a background thread for the duration of the block."""
+    server = FakeFPLServer(("127.0.0.1", port), league=league, recordings_dir=recordings_dir,
+                           latency_ms=latency_ms, jitter_ms=jitter_ms,
+                           throttle_rate=throttle_rate, error_rate=error_rate)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded or synthetic FPL API responses locally.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--recordings", help="Directory of recorded responses to replay")
+    parser.add_argument("--record-from", help="Upstream API base URL to proxy and record missing responses from")
+    parser.add_argument("--entries", type=int, default=0, help="Size of the synthetic league (0 = none)")
+    parser.add_argument("--league-id", type=int, default=1)
+    parser.add_argument("--gameweek", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    league = SyntheticLeague(args.entries, args.league_id, args.gameweek, args.seed) if args.entries else None
+    server = FakeFPLServer(("127.0.0.1", args.port), league=league, recordings_dir=args.recordings,
+                           record_from=args.record_from, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           throttle_rate=args.throttle_rate, error_rate=args.error_rate)
+    print(f"Fake FPL API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Requests served: {dict(server.request_counts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Synthetic FPL data for development and benchmarking.
+
+``SyntheticLeague`` answers every endpoint used in ``utils.py`` for a made-up
+H2H league of any size (10 to 10,000+ entries), generating responses on
+demand from a seed so the same league always produces the same data. Scores
+are consistent across endpoints: a manager's picks, their gameweek points,
+the H2H results and the standings all agree.
+
+Run directly to write a sample set of responses to disk, which the fake API
+server can then replay:
+
+    python mock_fpl_data/pipeline_mock_data.py --entries 20 --output mock_fpl_data/recordings
+"""
+import argparse
+import json
+import os
+import random
+import re
+from functools import lru_cache
+
+NUM_PLAYERS = 700
+NUM_EVENTS = 38
+PAGE_SIZE = 50
+
+
+class SyntheticLeague:
+    def __init__(self, num_entries=20, league_id=1, current_gw=24, seed=0):
+        self.num_entries = num_entries
+        self.league_id = league_id
+        self.current_gw = current_gw
+        self.seed = seed
+        self.entry_ids = [100000 + i for i in range(1, num_entries + 1)]
+        self._standings = None
+
+    def _rng(self, *parts):
+        return random.Random(":".join(str(p) for p in (self.seed, *parts)))
+
+    # -- underlying data -------------------------------------------------
+
+    @lru_cache(maxsize=NUM_EVENTS + 1)
+    def event_points(self, gw):
+        rng = self._rng("live", gw)
+        points = [0] * (NUM_PLAYERS + 1)
+        for element in range(1, NUM_PLAYERS + 1):
+            points[element] = rng.choice((0, 1, 1, 2, 2, 2, 3, 5, 6, 8, 12))
+        return points
+
+    def picks(self, entry, gw):
+        rng = self._rng("picks", entry, gw)
+        elements = rng.sample(range(1, NUM_PLAYERS + 1), 15)
+        captain, vice = rng.sample(range(11), 2)
+        chip = "bboost" if rng.random() < 0.02 else None
+        picks = []
+        for index, element in enumerate(elements):
+            starting = index < 11 or chip == "bboost"
+            picks.append({
+                "element": element,
+                "position": index + 1,
+                "multiplier": (2 if index == captain else 1) if starting else 0,
+                "is_captain": index == captain,
+                "is_vice_captain": index == vice,
+            })
+        return picks, chip
+
+    def transfers(self, entry, gw):
+        rng = self._rng("transfers", entry, gw)
+        count = rng.choice((0, 1, 1, 1, 2, 3))
+        return count, max(0, count - 1) * 4
+
+    @lru_cache(maxsize=None)
+    def entry_gameweek(self, entry, gw):
+        """Return (points, points_on_bench, transfers, transfer_cost, chip) for an entry."""
+        picks, chip = self.picks(entry, gw)
+        live = self.event_points(gw)
+        points = sum(live[p["element"]] * p["multiplier"] for p in picks)
+        bench = sum(live[p["element"]] for p in picks if p["position"] > 11) if chip != "bboost" else 0
+        transfers, cost = self.transfers(entry, gw)
+        return points, bench, transfers, cost, chip
+
+    def net_points(self, entry, gw):
+        points, _, _, cost, _ = self.entry_gameweek(entry, gw)
+        return points - cost
+
+    @lru_cache(maxsize=NUM_EVENTS + 1)
+    def fixtures(self, gw):
+        """Round-robin pairings (circle method), adding an AVERAGE side for odd leagues."""
+        sides = list(self.entry_ids)
+        if len(sides) % 2:
+            sides.append(None)
+        n = len(sides)
+        rotation = (gw - 1) % (n - 1) if n > 1 else 0
+        rotated = [sides[0]] + sides[1:][rotation:] + sides[1:][:rotation]
+        pairs = [(rotated[i], rotated[n - 1 - i]) for i in range(n // 2)]
+
+        average = None
+        if None in sides:
+            scores = [self.net_points(e, gw) for e in self.entry_ids]
+            average = round(sum(scores) / len(scores))
+        results = []
+        for entry_1, entry_2 in pairs:
+            points_1 = self.net_points(entry_1, gw) if entry_1 else average
+            points_2 = self.net_points(entry_2, gw) if entry_2 else average
+            results.append({
+                "id": gw * 100000 + len(results),
+                "event": gw,
+                "entry_1_entry": entry_1,
+                "entry_1_name": f"Team {entry_1}" if entry_1 else "AVERAGE",
+                "entry_1_player_name": f"Manager {entry_1}" if entry_1 else "AVERAGE",
+                "entry_1_points": points_1,
+                "entry_2_entry": entry_2,
+                "entry_2_name": f"Team {entry_2}" if entry_2 else "AVERAGE",
+                "entry_2_player_name": f"Manager {entry_2}" if entry_2 else "AVERAGE",
+                "entry_2_points": points_2,
+                "league": self.league_id,
+            })
+        return results
+
+    def standings(self):
+        if self._standings is None:
+            rows = {}
+            previous = {}
+            for gw in range(1, self.current_gw + 1):
+                previous = {key: row["rank"] for key, row in rows.items()}
+                for match in self.fixtures(gw):
+                    for side, other in (("1", "2"), ("2", "1")):
+                        entry = match[f"entry_{side}_entry"]
+                        key = entry or "AVERAGE"
+                        row = rows.setdefault(key, {
+                            "entry": entry, "entry_name": match[f"entry_{side}_name"],
+                            "player_name": match[f"entry_{side}_player_name"],
+                            "total": 0, "points_for": 0, "rank": 0,
+                        })
+                        scored, conceded = match[f"entry_{side}_points"], match[f"entry_{other}_points"]
+                        row["points_for"] += scored
+                        row["total"] += 3 if scored > conceded else 1 if scored == conceded else 0
+                ordered = sorted(rows.values(), key=lambda r: (-r["total"], -r["points_for"]))
+                for rank, row in enumerate(ordered, start=1):
+                    row["rank"] = rank
+            for key, row in rows.items():
+                row["last_rank"] = previous.get(key, row["rank"])
+            self._standings = sorted(rows.values(), key=lambda r: r["rank"])
+        return self._standings
+
+    # -- endpoint responses ----------------------------------------------
+
+    @lru_cache(maxsize=1)
+    def bootstrap_static(self):
+        events = []
+        for gw in range(1, NUM_EVENTS + 1):
+            events.append({
+                "id": gw, "name": f"Gameweek {gw}", "deadline_time": None,
+                "finished": gw <= self.current_gw, "data_checked": gw < self.current_gw,
+                "is_previous": gw == self.current_gw, "is_current": gw == self.current_gw,
+                "is_next": gw == self.current_gw + 1,
+                "average_entry_score": 50, "highest_score": 120,
+            })
+        live = self.event_points(self.current_gw)
+        elements = []
+        for element in range(1, NUM_PLAYERS + 1):
+            elements.append({
+                "id": element, "web_name": f"Player{element}", "event_points": live[element],
+                # Padding standing in for the ~90 other fields of the real payload
+                **{f"stat_{i}": i * element % 97 for i in range(80)},
+            })
+        return {"events": events, "elements": elements, "teams": [], "element_types": []}
+
+    def h2h_standings(self, page):
+        rows = self.standings()
+        start = (page - 1) * PAGE_SIZE
+        return {
+            "league": {"id": self.league_id, "name": f"Synthetic League {self.league_id}"},
+            "standings": {
+                "has_next": start + PAGE_SIZE < len(rows),
+                "page": page,
+                "results": rows[start:start + PAGE_SIZE],
+            },
+        }
+
+    def h2h_matches(self, page, event=None):
+        gameweeks = [event] if event else range(1, self.current_gw + 1)
+        results = [match for gw in gameweeks for match in self.fixtures(gw)]
+        start = (page - 1) * PAGE_SIZE
+        return {
+            "has_next": start + PAGE_SIZE < len(results),
+            "page": page,
+            "results": results[start:start + PAGE_SIZE],
+        }
+
+    def entry_picks(self, entry, gw):
+        picks, chip = self.picks(entry, gw)
+        # The same row entry/{id}/history has for the gameweek, as in the real API
+        return {
+            "active_chip": chip,
+            "picks": picks,
+            "entry_history": self.entry_history(entry)["current"][gw - 1],
+        }
+
+    def entry_history(self, entry):
+        current = []
+        total = 0
+        for gw in range(1, self.current_gw + 1):
+            points, bench, transfers, cost, _ = self.entry_gameweek(entry, gw)
+            total += points - cost
+            rng = self._rng("rank", entry, gw)
+            current.append({
+                "event": gw, "points": points, "total_points": total,
+                "rank": rng.randint(1, 10_000_000), "overall_rank": rng.randint(1, 10_000_000),
+                "points_on_bench": bench, "event_transfers": transfers,
+                "event_transfers_cost": cost,
+            })
+        return {"current": current, "past": [], "chips": []}
+
+    def entry_transfers(self, entry):
+        transfers = []
+        for gw in range(1, self.current_gw + 1):
+            count, _ = self.transfers(entry, gw)
+            rng = self._rng("transfer_players", entry, gw)
+            for _ in range(count):
+                element_in, element_out = rng.sample(range(1, NUM_PLAYERS + 1), 2)
+                transfers.append({
+                    "element_in": element_in, "element_in_cost": 60,
+                    "element_out": element_out, "element_out_cost": 60,
+                    "entry": entry, "event": gw, "time": None,
+                })
+        return list(reversed(transfers))
+
+    def event_live(self, gw):
+        live = self.event_points(gw)
+        return {"elements": [
+            {"id": element, "stats": {"total_points": live[element], "minutes": 90}, "explain": []}
+            for element in range(1, NUM_PLAYERS + 1)
+        ]}
+
+    def response(self, path, query):
+        """Return the JSON body for an API path (without the /api prefix), or None."""
+        def page():
+            return int(query.get("page", query.get("page_standings", 1)))
+
+        if re.fullmatch(r"/bootstrap-static/?", path):
+            return self.bootstrap_static()
+        if re.fullmatch(rf"/leagues-h2h/{self.league_id}/standings/?", path):
+            return self.h2h_standings(int(query.get("page_standings", 1)))
+        if re.fullmatch(rf"/leagues-h2h-matches/league/{self.league_id}/?", path):
+            event = int(query["event"]) if "event" in query else None
+            return self.h2h_matches(page(), event)
+        match = re.fullmatch(r"/entry/(\d+)/event/(\d+)/picks/?", path)
+        if match:
+            return self.entry_picks(int(match[1]), int(match[2]))
+        match = re.fullmatch(r"/entry/(\d+)/history/?", path)
+        if match:
+            return self.entry_history(int(match[1]))
+        match = re.fullmatch(r"/entry/(\d+)/transfers/?", path)
+        if match:
+            return self.entry_transfers(int(match[1]))
+        match = re.fullmatch(r"/event/(\d+)/live/?", path)
+        if match:
+            return self.event_live(int(match[1]))
+        return None
+
+
+def recording_filename(path, query):
+    """File name used for a recorded response, e.g. ``entry_101_event_3_picks.json``."""
+    name = path.strip("/").replace("/", "_")
+    for key in sorted(query):
+        name += f"__{key}_{query[key]}"
+    return name + ".json"
+
+
+def write_recordings(league, output_dir):
+    """Write every response needed for the league's current gameweek to ``output_dir``."""
+    os.makedirs(output_dir, exist_ok=True)
+    gw = league.current_gw
+    requests_to_record = [("/bootstrap-static/", {}), (f"/event/{gw}/live/", {})]
+    pages = (len(league.standings()) + PAGE_SIZE - 1) // PAGE_SIZE
+    requests_to_record += [(f"/leagues-h2h/{league.league_id}/standings/", {"page_standings": p})
+                           for p in range(1, pages + 1)]
+    requests_to_record.append((f"/leagues-h2h-matches/league/{league.league_id}", {"page": 1, "event": gw}))
+    for entry in league.entry_ids:
+        requests_to_record += [
+            (f"/entry/{entry}/event/{gw}/picks/", {}),
+            (f"/entry/{entry}/history/", {}),
+            (f"/entry/{entry}/transfers/", {}),
+        ]
+    for path, query in requests_to_record:
+        with open(os.path.join(output_dir, recording_filename(path, query)), "w") as f:
+            json.dump(league.response(path, {k: str(v) for k, v in query.items()}), f)
+    print(f"Wrote {len(requests_to_record)} responses to {output_dir}/")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic FPL API responses.")
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--league-id", type=int, default=1)
+    parser.add_argument("--gameweek", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="mock_fpl_data/recordings")
+    args = parser.parse_args()
+    league = SyntheticLeague(args.entries, args.league_id, args.gameweek, args.seed)
+    write_recordings(league, args.output)
+
+
+if __name__ == "__main__":
+    main()
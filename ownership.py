@@ -0,0 +1,171 @@
+"""
+League-wide ownership and differentials for a gameweek.
+
+``OwnershipMatrix`` holds every pick of the gameweek as a sparse manager x
+player matrix in coordinate form (one row per pick: manager, element,
+multiplier, bench flag). League effective ownership, per-fixture shared and
+differential players and the points each differential swung are computed
+from it with array operations, so the cost grows with the number of picks
+rather than the number of manager pairs.
+"""
+import numpy as np
+
+
+class OwnershipMatrix:
+    """
+    Sparse (COO) manager x player matrix built from picks responses.
+
+    ``rows[i]``, ``cols[i]``, ``multiplier[i]`` and ``bench[i]`` describe pick
+    ``i``: the manager's row in ``entries``, the element ID, the points
+    multiplier (0 on the bench, 2 for the captain, 3 for a triple captain)
+    and whether the player started on the bench. Picks are sorted by
+    ``(row, element)`` so single cells can be found with a binary search.
+    """
+
+    __slots__ = ("entries", "row", "rows", "cols", "multiplier", "bench", "_keys", "_stride")
+
+    def __init__(self, picks_lookup):
+        self.entries = list(picks_lookup)
+        self.row = {entry: i for i, entry in enumerate(self.entries)}
+
+        picks = [
+            (i, pick["element"], pick.get("multiplier", 1), pick["position"] > 11)
+            for i, entry in enumerate(self.entries)
+            for pick in picks_lookup[entry]["picks"]
+        ]
+        if picks:
+            rows, cols, multiplier, bench = (np.array(column) for column in zip(*picks))
+        else:
+            rows = cols = multiplier = np.array([], dtype=int)
+            bench = np.array([], dtype=bool)
+
+        self._stride = int(cols.max()) + 1 if len(cols) else 1
+        keys = rows * self._stride + cols
+        order = np.argsort(keys, kind="stable")
+        self.rows, self.cols = rows[order], cols[order]
+        self.multiplier, self.bench = multiplier[order], bench[order]
+        self._keys = keys[order]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, rows, cols):
+        """Multiplier for each ``(row, element)`` pair, or -1 where it wasn't picked."""
+        keys = np.asarray(rows) * self._stride + np.asarray(cols)
+        index = np.searchsorted(self._keys, keys)
+        found = index < len(self._keys)
+        found[found] = self._keys[index[found]] == keys[found]
+        return np.where(found, self.multiplier[np.minimum(index, len(self._keys) - 1)], -1)
+
+    def effective_ownership(self, size=0):
+        """
+        League effective ownership per element: the average multiplier, so
+        a player every manager captains scores 2.0 and a benched one 0.
+        """
+        return np.bincount(self.cols, weights=self.multiplier, minlength=size) / max(len(self), 1)
+
+    def sole_owners(self, size=0):
+        """
+        Return ``(only_owner, only_without)`` arrays indexed by element ID:
+        the row of the one manager who picked the player, or of the one
+        manager who didn't, and -1 where that doesn't apply.
+        """
+        n = len(self)
+        counts = np.bincount(self.cols, minlength=size)
+        # Sum of the owning rows identifies the owner (or, from the total, the non-owner)
+        row_sums = np.bincount(self.cols, weights=self.rows, minlength=size).astype(np.int64)
+        only_owner = np.where(counts == 1, row_sums, -1)
+        only_without = np.where((counts == n - 1) & (n > 2), n * (n - 1) // 2 - row_sums, -1)
+        return only_owner, only_without
+
+    def differentials(self, pairs, points):
+        """
+        Compare each fixture's two squads. ``pairs`` is a list of
+        ``(entry, opponent)`` tuples. For every pick it returns the fixture
+        index (-1 if the manager isn't in ``pairs``), whether it is a
+        differential (started by this manager, not by the opponent), whether
+        it is shared (started by both) and the points it swung towards its
+        manager (points times the difference in multipliers).
+        """
+        fixture = np.full(len(self), -1)
+        opponent = np.full(len(self), -1)
+        for index, (entry, other) in enumerate(pairs):
+            if entry in self.row and other in self.row:
+                fixture[self.row[entry]], opponent[self.row[entry]] = index, self.row[other]
+                fixture[self.row[other]], opponent[self.row[other]] = index, self.row[entry]
+
+        pick_fixture = fixture[self.rows] if len(self.rows) else np.array([], dtype=int)
+        in_fixture = pick_fixture >= 0
+        opponent_multiplier = np.full(len(self.rows), -1)
+        opponent_multiplier[in_fixture] = self.lookup(opponent[self.rows[in_fixture]], self.cols[in_fixture])
+
+        started = self.multiplier > 0
+        differential = in_fixture & started & (opponent_multiplier <= 0)
+        shared = in_fixture & started & (opponent_multiplier > 0)
+        swing = np.asarray(points)[self.cols] * (self.multiplier - np.maximum(opponent_multiplier, 0))
+        return pick_fixture, differential, shared, np.where(in_fixture, swing, 0)
+
+
+def add_ownership(match_reports, picks_lookup, player_name_lookup, player_points_lookup, top=3):
+    """
+    Add league-wide ownership context to match reports in place.
+
+    Each report gets ``differentials``: per side, the ``top`` differentials
+    by points swung, each with its league effective ownership (``eo``, in
+    percent), plus the total swing and the number of shared starters.
+    Each manager's side gets ``only_owner_of`` and ``only_one_without``: the
+    top scorers among the players nobody else in the league picked, and
+    among the ones everybody else did.
+    """
+    entries = [
+        report[side]["manager_id"] for report in match_reports
+        for side in ("team_1", "team_2") if "manager_id" in report[side]
+    ]
+    matrix = OwnershipMatrix({entry: picks_lookup[entry] for entry in entries if entry in picks_lookup})
+    size = len(player_points_lookup)
+    only_owner, only_without = matrix.sole_owners(size)
+    eo = np.rint(100 * matrix.effective_ownership(size)).astype(np.int64)
+
+    pairs = [(report["team_1"].get("manager_id"), report["team_2"].get("manager_id")) for report in match_reports]
+    pick_fixture, differential, shared, swing = matrix.differentials(pairs, player_points_lookup)
+    shared_starters = np.bincount(pick_fixture[shared], minlength=len(pairs)) // 2
+
+    # Only the (few) differential picks are turned back into Python objects
+    by_manager = {}
+    for i in np.flatnonzero(differential):
+        by_manager.setdefault(matrix.entries[matrix.rows[i]], []).append({
+            "name": player_name_lookup[matrix.cols[i]],
+            "points": int(player_points_lookup[matrix.cols[i]]),
+            "multiplier": int(matrix.multiplier[i]),
+            "swing": int(swing[i]),
+            "eo": int(eo[matrix.cols[i]]),
+        })
+
+    # Highest scorers first, so the few that are kept are the ones that mattered
+    sole = {}
+    for kind, rows in enumerate((only_owner, only_without)):
+        elements = np.flatnonzero(rows >= 0)
+        elements = elements[np.argsort(-np.asarray(player_points_lookup)[elements], kind="stable")]
+        for element in elements:
+            players = sole.setdefault(matrix.entries[rows[element]], ([], []))[kind]
+            if len(players) < top:
+                players.append(player_name_lookup[element])
+
+    for index, report in enumerate(match_reports):
+        if None in pairs[index]:
+            continue  # AVERAGE has no squad to compare
+        result = {"shared_starters": int(shared_starters[index])}
+        for side, entry in zip(("team_1", "team_2"), pairs[index]):
+            players = sorted(by_manager.get(entry, []), key=lambda player: player["swing"], reverse=True)
+            result[side] = players[:top]
+            result[f"{side}_swing"] = sum(player["swing"] for player in players)
+        report["differentials"] = result
+
+    for report in match_reports:
+        for side in ("team_1", "team_2"):
+            entry = report[side].get("manager_id")
+            if entry is not None:
+                owner_of, without = sole.get(entry, ([], []))
+                report[side]["only_owner_of"] = owner_of
+                report[side]["only_one_without"] = without
+    return match_reports
@@ -1,80 +1,103 @@
+import argparse
 import json
+import os
+from collections import defaultdict
+from concurrent.futures import as_completed
+from analytics import SeasonMatrix, season_stats
 from utils import (
-    get_h2h_league_standings,
+    LIVE_TTL,
+    MAX_WORKERS,
+    get_league_standings,
     get_h2h_league_matches,
-    get_manager_history,
+    get_h2h_league_matches_for_event,
+    get_manager_history_batch,
+    get_manager_transfers_batch,
     get_gameweek_picks,
-    get_player_data
+    get_event_points,
+    get_finished_events,
+    get_fixture_entry_ids,
+    get_player_table
 )
-from llm_summary import query_ollama, save_output
+from llm_summary import OLLAMA, stream_ollama, tee_to_file
+from metrics import METRICS, ContextThreadPoolExecutor
+from ownership import add_ownership
+from prompt_encoder import count_tokens, encode_match_reports
+from standings import standings_from_fixtures
+from store import STORE
+from transfers import add_transfer_impact
 from pprint import pprint
 
-print("Loading data from API...")
+# Bios key used for the AVERAGE team in leagues with an odd number of teams
+AVERAGE_BIO_ID = 1000001
 
-# Load config, bios and prompts data
-with open("fpl_data/config.json") as f:
-    config = json.load(f)
 
-with open("fpl_data/bios.json") as f:
-    bios = json.load(f)
+def load_inputs():
+    """Load config, bios and prompts data from disk."""
+    with open("fpl_data/config.json") as f:
+        config = json.load(f)
 
-with open("prompts.json") as f:
-    prompts = json.load(f)
+    with open("fpl_data/bios.json") as f:
+        bios = json.load(f)
 
-h2h_league_id = config["h2h_league_id"]
-gameweek = config["latest_gameweek"]
+    with open("prompts.json") as f:
+        prompts = json.load(f)
 
-# Load player data for name lookups
-player_data = get_player_data()
-if not player_data:
-    raise Exception("Failed to load player data from API.")
-else:
-    print("Player data loaded successfully.")
-players = player_data["elements"]
-player_name_lookup = {p["id"]: p["web_name"] for p in players}
-player_points_lookup = {p["id"]: p["event_points"] for p in players}
+    return config, bios, prompts
 
 
-def get_average_standings(standings, match):
-    for position in standings:
-        if position["entry_name"] == "AVERAGE":
-            rank = position["rank"]
-            previous_rank = position["last_rank"]
-            league_points = position["total"]
-            total_points = position["points_for"]
-            break
+def get_bio(bios, manager_id, team_name="Unknown"):
+    """Return a manager's bio, falling back to placeholders for unknown managers."""
+    team_bio = bios.get(str(manager_id))
+    if isinstance(team_bio, dict):
+        return team_bio
     return {
-        "name": bios.get(str(1000001), {}).get("team_name", "Unknown"),
-        "manager_points": match["entry_1_points"],
+        "team_name": team_name,
+        "manager": "Unknown",
+        "league_wins": 0,
+        "bio": "No bio available.",
+    }
+
+
+def get_average_standings(standings, match, bios):
+    position = standings.average
+    rank = position["rank"]
+    previous_rank = position["last_rank"]
+    league_points = position["total"]
+    total_points = position["points_for"]
+    return {
+        "name": bios.get(str(AVERAGE_BIO_ID), {}).get("team_name", "Unknown"),
+        "manager_points": match["entry_1_points"] if match["entry_1_name"] == "AVERAGE" else match["entry_2_points"],
         "league_rank": rank,
         "previous_league_rank": previous_rank,
         "overall_league_points": league_points,
         "overall_fpl_points": total_points,
-        "background": bios.get(str(1000001), "No bio available.")
+        "background": get_bio(bios, AVERAGE_BIO_ID, "AVERAGE")
     }
 
 
-def extract_match_summary(manager_id, gameweek):
+def extract_match_summary(manager_id, gameweek, player_name_lookup, player_points_lookup,
+                          standings, picks_lookup, bios, season=None):
     """Extract match summary including captain/vice logic.
 
     Both ``is_captain`` and ``is_vice_captain`` are checked to determine who
     actually captained the side. If the original captain is benched, the
-    vice captain's points and name will be used.
+    vice captain's points and name will be used. ``season`` optionally maps
+    manager ID to season stats (see ``analytics.season_stats``).
     """
-    picks_data = get_gameweek_picks(manager_id, gameweek)  # Get data from API
+    picks_data = picks_lookup.get(manager_id)  # Prefetched in one batch
+    if picks_data is None:
+        picks_data = get_gameweek_picks(manager_id, gameweek)  # Get data from API
     picks = picks_data["picks"]
     manager_points = picks_data["entry_history"]["points"] - picks_data["entry_history"]["event_transfers_cost"]
     bench_points = picks_data["entry_history"]["points_on_bench"]
     transfers_made = picks_data["entry_history"]["event_transfers"]
     chip = picks_data.get("active_chip") or "None"
 
-    for position in standings:
-        if position["entry"] == manager_id:
-            rank = position["rank"]
-            previous_rank = position["last_rank"]
-            league_points = position["total"]
-            total_points = position["points_for"]
-            break
+    position = standings[manager_id]
+    rank = position["rank"]
+    previous_rank = position["last_rank"]
+    league_points = position["total"]
+    total_points = position["points_for"]
 
     player_points = []
     bench_player_points = []
@@ -120,9 +143,9 @@ def extract_match_summary(manager_id, gameweek):
     top_players = sorted(player_points, key=lambda x: x['points'], reverse=True)[:3]
     bottom_players = sorted(player_points, key=lambda x: x["points"])[:3]
 
-    team_bio = bios.get(str(manager_id), "No bio available.")
+    team_bio = get_bio(bios, manager_id, position.get("entry_name", "Unknown"))
 
-    return {
+    summary = {
         "manager_id": manager_id,
         "manager_points": manager_points,
         "bench_points": bench_points,
@@ -142,32 +165,16 @@ def extract_match_summary(manager_id, gameweek):
         "number_of_league_titles": team_bio['league_wins'],
         "background": team_bio['bio']
     }
+    if season and manager_id in season:
+        summary["season"] = season[manager_id]
+    return summary
+
+
+def build_match_report(match, match_num, gameweek, player_name_lookup, player_points_lookup,
+                       standings, picks_lookup, bios, season=None):
+    """Build the match report dict for one fixture, or return None if it can't be reported."""
+    summary_args = (player_name_lookup, player_points_lookup, standings, picks_lookup, bios, season)
 
-# Fetch league data
-standings_data = get_h2h_league_standings(h2h_league_id)  # Get data from API
-if not standings_data:
-    raise Exception("Failed to load league standings from API.")
-else:
-    print("League standings loaded successfully.")
-standings = standings_data["standings"]["results"]
-matches_data = get_h2h_league_matches(h2h_league_id)  # Get data from API
-if not matches_data:
-    raise Exception("Failed to load league matches from API.")
-else:
-    print("League matches loaded successfully.")
-fixtures = matches_data["results"]
-
-print("Finished loading data from API.")
-
-match_reports = []
-match_num = 0
-
-
-for match in fixtures:
-    if match["event"] != gameweek:
-        continue
-    
-    match_num += 1
     print(f"Running process for Match {match_num}...")
     team_1_id = match["entry_1_entry"]
     team_2_id = match["entry_2_entry"]
@@ -178,65 +185,426 @@ for match in fixtures:
     if team_1_name != "AVERAGE" and team_2_name != "AVERAGE":
         print(f"Processing match between {team_1_name} and {team_2_name}...")
 
-        team_1 = extract_match_summary(team_1_id, gameweek=gameweek)
-        team_2 = extract_match_summary(team_2_id, gameweek=gameweek)
+        team_1 = extract_match_summary(team_1_id, gameweek, *summary_args)
+        team_2 = extract_match_summary(team_2_id, gameweek, *summary_args)
 
-        match_reports.append({
+        report = {
             "match": match_num,
             "team_1": {**team_1, "name": team_1_name},
             "team_2": {**team_2, "name": team_2_name},
             "score": f"{team_1['manager_points']} - {team_2['manager_points']}",
-        })
-        print("Finished processing match report for Match", match_num)
+        }
     elif team_1_name == "AVERAGE":
         print(f"Processing match between Average and {team_2_name}...")
-        team_1 = get_average_standings(standings, match)
-        team_2 = extract_match_summary(team_2_id, gameweek=gameweek)
+        team_1 = get_average_standings(standings, match, bios)
+        team_2 = extract_match_summary(team_2_id, gameweek, *summary_args)
 
-        match_reports.append({
+        report = {
             "match": match_num,
             "team_1": {**team_1, "name": team_1['background']['team_name']},
             "team_2": {**team_2, "name": team_2_name},
             "score": f"{match['entry_1_points']} - {team_2['manager_points']}",
-        })
-        print("Finished processing match report for Match", match_num)
+        }
     elif team_2_name == "AVERAGE":
         print(f"Processing match between {team_1_name} and Average...")
-        team_1 = extract_match_summary(team_1_id, gameweek=gameweek)
-        team_2 = get_average_standings(standings, match)
+        team_1 = extract_match_summary(team_1_id, gameweek, *summary_args)
+        team_2 = get_average_standings(standings, match, bios)
 
-        match_reports.append({
+        report = {
             "match": match_num,
             "team_1": {**team_1, "name": team_1_name},
             "team_2": {**team_2, "name": team_2['background']['team_name']},
             "score": f"{team_1['manager_points']} - {match['entry_2_points']}",
-        })
-        print("Finished processing match report for Match", match_num)
+        }
     else:
         print(f"Skipping match {match_num} as it doesn't match.")
-                
-        
-
-print("All match reports processed. Generating summary...")
-
-# Create prompt for LLM from templates and match reports
-full_prompt = (prompts["intro"])
-full_prompt += f'\n{match_reports}\n'
-full_prompt += prompts["outro"]
-
-print("Full prompt generated.")
-pprint(full_prompt)
-
-#######################################
-# Local LLM query via Ollama - can be removed if using external LLM
-#print("Querying LLM for summary...")
-#
-#model = "phi4"  # or "mistral" or whatever you've pulled via Ollama
-#summary = query_ollama(full_prompt, model=model)
-#
-#print("LLM summary generated. Saving to file...")
-#
-# Save to file
-#save_output(summary, filename=f"reports/GW{gameweek}_Match_Report.md")
-#print(f"LLM summary saved as GW{gameweek}_Match_Report.md")
-#######################################
\ No newline at end of file
+        return None
+
+    print("Finished processing match report for Match", match_num)
+    return report
+
+
+def build_match_reports(fixtures, gameweek, player_name_lookup, player_points_lookup,
+                        standings, picks_lookup, bios, season=None):
+    """Turn a gameweek's fixtures into the list of match report dicts used in the prompt."""
+    match_reports = []
+    match_num = 0
+
+    for match in fixtures:
+        if match["event"] != gameweek:
+            continue
+
+        match_num += 1
+        report = build_match_report(match, match_num, gameweek, player_name_lookup, player_points_lookup,
+                                    standings, picks_lookup, bios, season)
+        if report is not None:
+            match_reports.append(report)
+
+    return match_reports
+
+
+def iter_match_reports(fixtures, gameweek, player_name_lookup, player_points_lookup, standings, bios,
+                       picks_lookup=None, season=None, max_workers=MAX_WORKERS, first_match=1):
+    """
+    Yield match reports one at a time, each as soon as the picks for both of
+    its managers have been fetched.
+
+    Reports come out in completion order and keep their fixture's ``match``
+    number, counted from ``first_match`` (for fixtures fed in a page at a
+    time). Picks already in ``picks_lookup`` aren't refetched; newly fetched
+    picks are added to it. ``season`` optionally maps manager ID to season
+    stats (see ``league_season_stats``).
+    """
+    picks_lookup = {} if picks_lookup is None else picks_lookup
+    matches = [match for match in fixtures if match["event"] == gameweek]
+
+    # Which entries each match is still waiting for, and the reverse
+    waiting = {index: set(get_fixture_entry_ids([match], gameweek)) for index, match in enumerate(matches)}
+    waiting_on = defaultdict(list)
+    for index, entries in waiting.items():
+        for entry in entries:
+            waiting_on[entry].append(index)
+
+    def report_for(index):
+        return build_match_report(matches[index], first_match + index, gameweek, player_name_lookup,
+                                  player_points_lookup, standings, picks_lookup, bios, season)
+
+    pool = ContextThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            pool.submit(get_gameweek_picks, entry, gameweek): entry
+            for entry in waiting_on if entry not in picks_lookup
+        }
+        for entry in waiting_on:
+            if entry in picks_lookup:
+                for index in waiting_on[entry]:
+                    waiting[index].discard(entry)
+
+        done = set()
+        for index, entries in waiting.items():
+            if not entries:
+                done.add(index)
+                report = report_for(index)
+                if report is not None:
+                    yield report
+
+        for future in as_completed(futures):
+            entry = futures[future]
+            picks_lookup[entry] = future.result()
+            for index in waiting_on[entry]:
+                waiting[index].discard(entry)
+                if not waiting[index] and index not in done:
+                    done.add(index)
+                    report = report_for(index)
+                    if report is not None:
+                        yield report
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def _load_through(entries, gameweek, stored, fetch_batch, record):
+    """
+    Per-manager season data keyed by manager ID. Once ``gameweek`` is
+    finished, what ``stored`` already holds up to it is used as it is; the
+    rest comes from ``fetch_batch`` and is passed to ``record`` for next time.
+    """
+    entries = list(dict.fromkeys(entries))
+    finished_events = get_finished_events()
+    found = stored(entries, gameweek) if gameweek in finished_events else {}
+    fetched = fetch_batch(entry for entry in entries if entry not in found)
+    if fetched:
+        record(fetched, max(finished_events, default=0))
+    found.update(fetched)
+    return {entry: found[entry] for entry in entries}
+
+
+def load_histories(entries, gameweek):
+    """Managers' season histories up to ``gameweek``, from the store where possible."""
+    return _load_through(entries, gameweek, STORE.histories, get_manager_history_batch,
+                         STORE.record_histories)
+
+
+def load_transfers(entries, gameweek):
+    """Managers' transfer lists up to ``gameweek``, from the store where possible."""
+    return _load_through(entries, gameweek, STORE.transfers, get_manager_transfers_batch,
+                         STORE.record_transfers)
+
+
+def load_league_results(h2h_league_id, gameweek):
+    """
+    Every H2H result in a league up to ``gameweek``. The local store is used
+    if it has every gameweek; otherwise the full match list is fetched
+    (finished pages come from the cache) and stored.
+    """
+    stored = STORE.matches(h2h_league_id, gameweek)
+    if {match["event"] for match in stored} >= set(range(1, gameweek + 1)):
+        return stored
+    fixtures = get_h2h_league_matches(h2h_league_id)["results"]
+    STORE.record_matches(h2h_league_id, fixtures)
+    return [match for match in fixtures if match["event"] <= gameweek]
+
+
+def load_standings(h2h_league_id, gameweek, size=None):
+    """
+    The league table after ``gameweek``. The standings endpoint only has the
+    latest table and is never final, so for an earlier or finished gameweek
+    the table is rebuilt from the league's results (cached permanently)
+    instead. ``size`` is passed on to ``get_league_standings``.
+    """
+    player_table = get_player_table()
+    latest = player_table.latest_gameweek()
+    if (latest is not None and gameweek < latest) or gameweek in player_table.finished_events():
+        return standings_from_fixtures(load_league_results(h2h_league_id, gameweek), gameweek)
+    return get_league_standings(h2h_league_id, parallel=True, size=size)
+
+
+def load_gameweek_table(h2h_league_id, gameweek, size=None, ttl=LIVE_TTL):
+    """
+    The player points and league table every data stage builds a gameweek's
+    reports from. Returns ``(points, standings)``.
+
+    Points come from ``event/{gw}/live`` (bootstrap-static only knows the
+    current gameweek), padded to the player table and refreshed after
+    ``ttl`` seconds. The table comes from ``load_standings``, which ``size``
+    is passed on to.
+    """
+    points = get_event_points(gameweek, len(get_player_table().names), ttl)
+    return points, load_standings(h2h_league_id, gameweek, size)
+
+
+def add_season_stats(match_reports, season):
+    """Add each manager's season stats (see ``league_season_stats``) to match reports in place."""
+    for report in match_reports:
+        for side in ("team_1", "team_2"):
+            entry = report[side].get("manager_id")
+            if entry in season:
+                report[side]["season"] = season[entry]
+    return match_reports
+
+
+def league_season_stats(h2h_league_id, entries, gameweek):
+    """
+    Season stats for every manager in a league, computed in one pass over a
+    league-wide ``SeasonMatrix``, with streaks from the league's results.
+    """
+    histories = load_histories(entries, gameweek)
+    return season_stats(SeasonMatrix(histories, gameweek), load_league_results(h2h_league_id, gameweek))
+
+
+def build_instructions(task, detail, brutality_level=3):
+    """Assemble the app's LLM instructions from the task and detail prompts and a brutality level."""
+    return task + f"\nBrutality Level: {brutality_level}\n" + detail
+
+
+def build_prompt(match_reports, prompts, token_budget=None):
+    """Create prompt for LLM from templates and compactly encoded match reports."""
+    full_prompt = (prompts["intro"])
+    full_prompt += f'\n{encode_match_reports(match_reports, token_budget)}\n'
+    full_prompt += prompts["outro"]
+    return full_prompt
+
+
+def apply_bios(match_reports, bios):
+    """
+    Return a copy of match reports with each team's bio fields taken from
+    ``bios``. Lets the fetched data be reused while the bios are edited.
+    """
+    updated = []
+    for report in match_reports:
+        report = dict(report)
+        for side in ("team_1", "team_2"):
+            team = dict(report[side])
+            if "manager_id" in team:
+                team_bio = get_bio(bios, team["manager_id"], team["name"])
+                team["team_name"] = team_bio["team_name"]
+                team["manager"] = team_bio["manager"]
+                team["number_of_league_titles"] = team_bio["league_wins"]
+                team["background"] = team_bio["bio"]
+            else:
+                # AVERAGE team is named after its bio
+                team["background"] = get_bio(bios, AVERAGE_BIO_ID, "AVERAGE")
+                team["name"] = team["background"]["team_name"]
+            report[side] = team
+        updated.append(report)
+    return updated
+
+
+def add_head_to_head(match_reports, store, h2h_league_id, gameweek):
+    """Add each pairing's record from earlier gameweeks (from team 1's side) to its match report."""
+    for report in match_reports:
+        team_1_id = report["team_1"].get("manager_id")
+        team_2_id = report["team_2"].get("manager_id")
+        if team_1_id is None or team_2_id is None:
+            continue
+        record = store.head_to_head(h2h_league_id, team_1_id, team_2_id, before_event=gameweek)
+        if record["played"]:
+            report["head_to_head"] = record
+    return match_reports
+
+
+def prepare_match_data(h2h_league_id, gameweek):
+    """
+    Fetch what every match report needs: player data, the gameweek's player
+    points, standings and fixtures (see ``load_gameweek_table``). Returns
+    ``(player_table, points, standings, fixtures)``.
+    """
+    # Load player data for name lookups
+    with METRICS.stage("bootstrap"):
+        player_table = get_player_table()
+    if not len(player_table):
+        raise Exception("Failed to load player data from API.")
+    else:
+        print("Player data loaded successfully.")
+
+    # Fetch league data. Fixtures come first: two standings rows per fixture
+    # tells the standings fetch exactly how many pages to request.
+    with METRICS.stage("matches"):
+        matches_data = get_h2h_league_matches_for_event(h2h_league_id, gameweek)  # Get data from API
+    if not matches_data:
+        raise Exception("Failed to load league matches from API.")
+    else:
+        print("League matches loaded successfully.")
+    fixtures = matches_data["results"]
+    with METRICS.stage("standings"):
+        points, standings = load_gameweek_table(h2h_league_id, gameweek, size=2 * len(fixtures) or None)
+    if not len(standings):
+        raise Exception("Failed to load league standings from API.")
+    else:
+        print("League standings loaded successfully.")
+
+    # Keep everything fetched in the local store for season-level queries
+    with METRICS.stage("store"):
+        STORE.record_players(player_table)
+        STORE.record_standings(h2h_league_id, gameweek, standings)
+        STORE.record_matches(h2h_league_id, fixtures)
+
+    return player_table, points, standings, fixtures
+
+
+def stream_match_data(h2h_league_id, gameweek, on_progress=None, picks_lookup=None, season=None):
+    """
+    Run the data stage for one league and gameweek, yielding each match
+    report as soon as its managers' picks are in, so consumers (the UI, the
+    prompt encoder, a per-match LLM writer) can start on early fixtures
+    while later picks are still downloading.
+
+    ``on_progress(done, total, report)`` is called after each report. Pass a
+    ``picks_lookup`` dict to collect every manager's picks as they arrive.
+    Reports don't carry season stats: pass a ``season`` dict and the whole
+    league's stats are computed in the background while the picks download
+    and put in it before the stream ends (see ``add_season_stats``).
+    """
+    player_table, points, standings, fixtures = prepare_match_data(h2h_league_id, gameweek)
+    total = len([match for match in fixtures if match["event"] == gameweek])
+    picks_lookup = {} if picks_lookup is None else picks_lookup
+
+    if season is not None:
+        # Season stats for the whole league, computed while the picks download
+        season_pool = ContextThreadPoolExecutor(max_workers=1)
+        season_stats_future = season_pool.submit(league_season_stats, h2h_league_id,
+                                                 get_fixture_entry_ids(fixtures, gameweek), gameweek)
+        season_pool.shutdown(wait=False)
+
+    # Name and points arrays are indexed by element ID, like the dicts they replaced
+    with METRICS.stage("match_reports"):
+        reports = iter_match_reports(fixtures, gameweek, player_table.names, points,
+                                     standings, {}, picks_lookup)
+        for done, report in enumerate(reports, start=1):
+            add_head_to_head([report], STORE, h2h_league_id, gameweek)
+            if on_progress:
+                on_progress(done, total, report)
+            yield report
+
+    with METRICS.stage("store"):
+        STORE.record_picks(gameweek, picks_lookup)
+    if season is not None:
+        with METRICS.stage("history"):
+            season.update(season_stats_future.result())
+    print("Finished loading data from API.")
+
+
+def load_match_data(h2h_league_id, gameweek, on_progress=None):
+    """
+    Run the data stage for one league and gameweek: fetch player data,
+    standings, fixtures and picks and build the match reports, in match order.
+    Past gameweeks get their own points and table (see ``prepare_match_data``).
+
+    Once every report is in, each manager's season stats are added (see
+    ``add_season_stats``), then league-wide ownership and each fixture's
+    differentials (see ``ownership.add_ownership``), then every
+    manager's transfers are loaded and scored against the gameweek's live
+    points (see ``transfers.add_transfer_impact``).
+
+    Bios are not applied (see ``apply_bios``), so the result depends only on
+    ``(h2h_league_id, gameweek)`` and can be cached on that key.
+    """
+    picks_lookup = {}
+    season = {}
+    match_reports = sorted(stream_match_data(h2h_league_id, gameweek, on_progress, picks_lookup, season),
+                           key=lambda report: report["match"])
+    add_season_stats(match_reports, season)
+    player_table = get_player_table()
+    points = get_event_points(gameweek, len(player_table.names))
+    with METRICS.stage("ownership"):
+        add_ownership(match_reports, picks_lookup, player_table.names, points)
+    with METRICS.stage("transfers"):
+        transfers_by_entry = load_transfers(picks_lookup, gameweek)
+        return add_transfer_impact(match_reports, transfers_by_entry, picks_lookup, player_table.names,
+                                   points, gameweek)
+
+
+def main():
+    config, bios, prompts = load_inputs()
+
+    parser = argparse.ArgumentParser(description="Build the match reports and prompt for one H2H league.")
+    parser.add_argument("--model", help="Ollama model to write the summary with (default: prompt only), "
+                                        "e.g. phi4 or mistral")
+    args = parser.parse_args()
+
+    METRICS.reset()
+    if args.model:
+        # Start loading the model now so it is ready by the time the prompt is
+        OLLAMA.preload(args.model)
+    print("Loading data from API...")
+
+    h2h_league_id = config["h2h_league_id"]
+    gameweek = config["latest_gameweek"]
+
+    match_reports = apply_bios(load_match_data(h2h_league_id, gameweek), bios)
+
+    print("All match reports processed. Generating summary...")
+
+    with METRICS.stage("prompt"):
+        full_prompt = build_prompt(match_reports, prompts, config.get("prompt_token_budget"))
+
+    print(f"Full prompt generated (~{count_tokens(full_prompt)} tokens).")
+    pprint(full_prompt)
+    os.makedirs("reports", exist_ok=True)
+
+    if args.model:
+        # Local LLM query via Ollama, streamed to the console and saved to file as it is generated
+        print("Querying LLM for summary...")
+        llm_stats = {}
+        try:
+            with METRICS.stage("llm"):
+                for chunk in tee_to_file(stream_ollama(full_prompt, model=args.model, stats=llm_stats),
+                                         f"reports/GW{gameweek}_Match_Report.md"):
+                    print(chunk, end="", flush=True)
+        finally:
+            # Free the model's memory now rather than when keep_alive runs out
+            OLLAMA.release(args.model)
+
+        print(f"\nFirst token after {llm_stats['time_to_first_token']:.1f}s, "
+              f"{llm_stats['tokens_per_second']:.1f} tokens/s")
+        print(f"LLM summary saved as GW{gameweek}_Match_Report.md")
+        # To write each match with its own prompt, several at once (faster on big
+        # leagues; run Ollama with OLLAMA_NUM_PARALLEL > 1), use
+        # round_up.generate_round_up(match_reports, prompts["intro"], model=args.model)
+
+    # Machine-readable timings and counters for this run
+    METRICS.save(f"reports/GW{gameweek}_run_report")
+    print(f"Run report saved as reports/GW{gameweek}_run_report.json / .prom")
+
+
+if __name__ == "__main__":
+    main()
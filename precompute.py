@@ -0,0 +1,139 @@
+"""
+Headless precompute daemon.
+
+Watches the bootstrap-static ``events`` for a gameweek to become finished
+and data checked, then builds the match reports, the app's prompt and
+(optionally) the LLM round-up for every configured league and saves them to
+the artifact store (``artifacts.py``). The app serves those directly, so the
+first page view after a gameweek ends needs no API or model calls.
+
+Usage:
+    python precompute.py                          # wait for each gameweek to finish
+    python precompute.py --gameweek 24 --once     # precompute a finished gameweek now
+    python precompute.py --model phi4 --per-match # also write the round-up
+"""
+import argparse
+import time
+
+from artifacts import latest_version, save_artifact
+from llm_summary import OLLAMA, query_ollama
+from pipeline import apply_bios, build_instructions, load_inputs, load_match_data
+from prompt_encoder import encode_match_reports
+from round_up import generate_round_up
+from utils import get_player_table
+
+# How often bootstrap-static is checked while waiting for a gameweek to finish
+POLL_SECONDS = 5 * 60
+
+
+def load_app_prompts():
+    """Return the task and detail prompts the app starts with."""
+    with open("prompt_task.md") as f:
+        task = f.read()
+    with open("prompt_detail.md") as f:
+        detail = f.read()
+    return task, detail
+
+
+def precompute_gameweek(league_ids, gameweek, bios, instructions, model=None, per_match=False,
+                        token_budget=None, meta=None):
+    """
+    Build and store reports for each league. The prompt is built exactly as
+    the app builds it, so the app can tell whether a stored summary matches
+    its current settings. Returns ``{league_id: version}``.
+    """
+    if model:
+        OLLAMA.preload(model)  # Loads while the first league's data is fetched
+    versions = {}
+    for league_id in league_ids:
+        print(f"Precomputing league {league_id}, Gameweek {gameweek}...")
+        match_reports = load_match_data(league_id, gameweek)
+        with_bios = apply_bios(match_reports, bios)
+        prompt = instructions + f"\n{encode_match_reports(with_bios, token_budget)}\n"
+
+        summary = None
+        if model and per_match:
+            summary = generate_round_up(with_bios, instructions, model=model)
+        elif model:
+            summary = query_ollama(prompt, model=model)
+
+        versions[league_id] = save_artifact(league_id, gameweek, match_reports, prompt, summary, meta={
+            "model": model,
+            "mode": "per_match" if per_match else "single",
+            "token_budget": token_budget,
+            **(meta or {}),
+        })
+        print(f"Saved league {league_id}, Gameweek {gameweek} as version {versions[league_id]}")
+    return versions
+
+
+def run_daemon(league_ids, precompute, gameweek=None, poll_seconds=POLL_SECONDS):
+    """
+    Poll bootstrap-static and call ``precompute(league_ids, gameweek)`` for
+    each gameweek once it is finished and data checked, starting at
+    ``gameweek`` (default: the latest finished one, so a daemon started
+    after a gameweek ends still builds it). Leagues that already have
+    reports for a gameweek are skipped. A failed ``precompute`` is logged
+    and retried on the next poll.
+    """
+    target = gameweek
+    while True:
+        player_table = get_player_table(refresh=True)
+        finished = player_table.finished_events()
+        if target is None:
+            target = max(finished, default=1)
+        if target > max(event["id"] for event in player_table.events):
+            print("Every gameweek has been precomputed.")
+            return
+
+        if target in finished:
+            missing = [league_id for league_id in league_ids if latest_version(league_id, target) is None]
+            try:
+                if missing:
+                    precompute(missing, target)
+            except Exception as e:
+                print(f"[{time.strftime('%H:%M:%S')}] Precomputing Gameweek {target} failed: {e}. "
+                      f"Retrying in {poll_seconds:g}s...")
+                time.sleep(poll_seconds)
+                continue
+            target += 1
+            continue
+
+        print(f"[{time.strftime('%H:%M:%S')}] Waiting for Gameweek {target} to finish...")
+        time.sleep(poll_seconds)
+
+
+def main():
+    config, bios, _ = load_inputs()
+
+    parser = argparse.ArgumentParser(description="Precompute reports as soon as each gameweek finishes.")
+    parser.add_argument("league_ids", nargs="*", type=int,
+                        help="H2H league IDs (defaults to h2h_league_ids, or h2h_league_id, in config.json)")
+    parser.add_argument("--gameweek", type=int, help="First gameweek to precompute")
+    parser.add_argument("--once", action="store_true",
+                        help="Precompute --gameweek (default: latest finished) now and exit")
+    parser.add_argument("--model", help="Ollama model for the round-up (default: no summary)")
+    parser.add_argument("--per-match", action="store_true", help="Write the round-up one match at a time")
+    parser.add_argument("--brutality", type=int, default=3)
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS)
+    args = parser.parse_args()
+
+    league_ids = args.league_ids or config.get("h2h_league_ids") or [config["h2h_league_id"]]
+    task, detail = load_app_prompts()
+    instructions = build_instructions(task, detail, args.brutality)
+
+    def precompute(leagues, gameweek):
+        return precompute_gameweek(
+            leagues, gameweek, bios, instructions, args.model, args.per_match,
+            config.get("prompt_token_budget") or None, meta={"brutality_level": args.brutality},
+        )
+
+    if args.once:
+        gameweek = args.gameweek or get_player_table().latest_gameweek()
+        precompute(league_ids, gameweek)
+    else:
+        run_daemon(league_ids, precompute, args.gameweek, args.poll_seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Compact text encoding of match reports for the LLM prompt.
+
+Dumping ``match_reports`` with ``repr`` repeats every key and quote for every
+team and includes each bio in full (the AVERAGE team's bio twice). The
+encoder writes one line per team bio and a couple of short lines per match
+instead, and can trim detail to fit a token budget.
+"""
+import re
+
+# Detail dropped, in order, when the encoded reports go over the token budget.
+# Each level keeps everything the later levels keep.
+TRIM_LEVELS = (
+    "full",
+    "no_bench_players",      # drop the bench player list (bench points total stays)
+    "short_bios",            # keep only the first sentence of each bio
+    "no_lowest_players",     # drop the lowest scoring players
+    "no_best_transfers",     # drop each team's best transfer (net transfer points stay)
+    "no_season_stats",       # drop form, streak and season totals
+    "no_differentials",      # drop differentials and sole ownership
+    "no_bios",               # drop bios altogether
+    "top_player_only",       # keep only the single top scorer
+)
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """
+    Estimate the number of LLM tokens in ``text``.
+
+    Counts words and punctuation marks, which tracks BPE tokenizers closely
+    enough for budgeting without pulling in a model-specific tokenizer.
+    """
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _team_bio(team):
+    """Return (team name, manager, titles, bio) for a team entry of a match report."""
+    background = team.get("background")
+    if isinstance(background, dict):
+        # AVERAGE team: the whole bio dict is stored as the background
+        return (
+            background.get("team_name", team.get("name")),
+            background.get("manager", "Unknown"),
+            background.get("league_wins", 0),
+            background.get("bio", ""),
+        )
+    return (
+        team.get("team_name", team.get("name")),
+        team.get("manager", "Unknown"),
+        team.get("number_of_league_titles", 0),
+        background or "",
+    )
+
+
+def _players(players):
+    return ", ".join(f"{p['name']} {p['points']}" for p in players) or "-"
+
+
+def _differentials(players):
+    return ", ".join(f"{p['name']} {p['points']} (EO {p['eo']}%)" for p in players) or "-"
+
+
+def _transfer(transfer):
+    return f"{transfer['in']} in for {transfer['out']} {transfer['net']:+d}"
+
+
+def _team_line(team, level):
+    trim = TRIM_LEVELS.index(level)
+    parts = [
+        f"{team['name']}: {team['manager_points']}pts",
+        f"rank {team['league_rank']} (was {team['previous_league_rank']})",
+        f"league pts {team['overall_league_points']}",
+        f"season pts {team['overall_fpl_points']}",
+    ]
+    if "captain" not in team:
+        # AVERAGE team only has score and standings
+        return " | ".join(parts)
+
+    transfers = f"transfers {team['number_of_transfers']}"
+    impact = team.get("transfer_impact")
+    if impact and (team["number_of_transfers"] or impact["cost"]):
+        transfers += f" (net {impact['net_points']:+d}"
+        if impact["best"] and trim < TRIM_LEVELS.index("no_best_transfers"):
+            transfers += f", best {_transfer(impact['best'])}"
+        transfers += ")"
+    parts += [
+        f"chip {team['chip_used']}",
+        transfers,
+        f"bench {team['bench_points']}pts",
+        f"C {team['captain']} {team['captain_points']}",
+    ]
+    top_players = team["top_scoring_players"]
+    if trim >= TRIM_LEVELS.index("top_player_only"):
+        top_players = top_players[:1]
+    parts.append(f"top {_players(top_players)}")
+    season = team.get("season")
+    if season and trim < TRIM_LEVELS.index("no_season_stats"):
+        parts.append(
+            f"form {season['form']} (season avg {season['season_average']})"
+            + (f" streak {season['streak']}" if season["streak"] else "")
+            + f" season bench {season['bench_points_total']} hits {season['transfer_hits_total']}"
+            + f" avg rank move {season['rank_volatility']}"
+        )
+    if trim < TRIM_LEVELS.index("no_differentials"):
+        if team.get("only_owner_of"):
+            parts.append(f"only owner of {', '.join(team['only_owner_of'])}")
+        if team.get("only_one_without"):
+            parts.append(f"only one without {', '.join(team['only_one_without'])}")
+    if trim < TRIM_LEVELS.index("no_lowest_players"):
+        parts.append(f"low {_players(team['lowest_scoring_players'])}")
+    if trim < TRIM_LEVELS.index("no_bench_players"):
+        parts.append(f"benched {_players(team['bench_player_points'])}")
+    return " | ".join(parts)
+
+
+def _bio_text(bio, level):
+    trim = TRIM_LEVELS.index(level)
+    if trim >= TRIM_LEVELS.index("no_bios"):
+        return None
+    if trim >= TRIM_LEVELS.index("short_bios"):
+        match = re.match(r".*?[.!?](\s|$)", bio)
+        bio = match.group(0).strip() if match else bio
+    return bio
+
+
+def iter_bio_lines(match_reports, level="full"):
+    """
+    Yield the TEAMS header and each team's bio line, once per team however
+    many times it appears. Only the team names seen so far are kept, so
+    ``match_reports`` can be a stream.
+    """
+    if TRIM_LEVELS.index(level) >= TRIM_LEVELS.index("no_bios"):
+        yield "TEAMS (name | manager | league titles)"
+    else:
+        yield "TEAMS (name | manager | league titles | bio)"
+    seen = set()
+    for report in match_reports:
+        for side in ("team_1", "team_2"):
+            team_name, manager, titles, bio = _team_bio(report[side])
+            if team_name in seen:
+                continue
+            seen.add(team_name)
+            bio = _bio_text(bio, level)
+            line = f"{team_name} | manager {manager} | titles {titles}"
+            if bio:
+                line += f" | {bio}"
+            yield line
+
+
+def encode_bios(match_reports, level="full"):
+    """Encode each team's bio once, however many times the team appears."""
+    return "\n".join(iter_bio_lines(match_reports, level))
+
+
+def encode_match(report, level="full"):
+    """Encode a single match report as a header line plus one line per team."""
+    team_1, team_2 = report["team_1"], report["team_2"]
+    lines = [
+        f"MATCH {report['match']}: {team_1['name']} {report['score']} {team_2['name']}",
+        "  " + _team_line(team_1, level),
+        "  " + _team_line(team_2, level),
+    ]
+    differentials = report.get("differentials")
+    if differentials and TRIM_LEVELS.index(level) < TRIM_LEVELS.index("no_differentials"):
+        sides = [
+            f"{team['name']} {_differentials(differentials[side])} (swing {differentials[f'{side}_swing']})"
+            for side, team in (("team_1", team_1), ("team_2", team_2))
+        ]
+        lines.append(f"  differentials: {' | '.join(sides)} | shared starters {differentials['shared_starters']}")
+    record = report.get("head_to_head")
+    if record:
+        lines.append(
+            f"  previous meetings: {record['played']}, {team_1['name']} "
+            f"W{record['won']} D{record['drawn']} L{record['lost']}"
+        )
+    return "\n".join(lines)
+
+
+def encode_transfers_of_the_week(match_reports):
+    """The league's best and worst transfer, or an empty string if there were none."""
+    of_the_week = next((report["transfers_of_the_week"] for report in match_reports
+                        if report.get("transfers_of_the_week")), None)
+    if not of_the_week:
+        return ""
+    return "TRANSFERS OF THE WEEK\n" + "\n".join(
+        f"{label}: {of_the_week[label]['team']} {_transfer(of_the_week[label])}" for label in ("best", "worst")
+    )
+
+
+def encode_match_reports(match_reports, token_budget=None):
+    """
+    Encode match reports as a compact, table-like block of text.
+
+    If ``token_budget`` is set, progressively lower-priority detail is
+    trimmed (see TRIM_LEVELS) until the estimate from ``count_tokens`` fits.
+    Scores, standings, chips and captains are never dropped, so the most
+    trimmed encoding is returned even if it is still over budget.
+    """
+    text = ""
+    transfers = encode_transfers_of_the_week(match_reports)
+    if transfers:
+        transfers = "\n\n" + transfers
+    for level in TRIM_LEVELS:
+        text = encode_bios(match_reports, level) + transfers + "\n\nMATCHES\n" + "\n".join(
+            encode_match(report, level) for report in match_reports
+        )
+        if token_budget is None or count_tokens(text) <= token_budget:
+            break
+    return text
@@ -0,0 +1,67 @@
+"""
+Process-wide resources shared by every Streamlit session.
+
+``app.py`` creates one ``SharedResources`` with ``st.cache_resource``. It
+holds the pooled HTTP session, the Ollama client, the parsed player table
+and a TTL cache of the data stage with single-flight loading, so when several league members
+open the app at once the league is fetched once and the rest wait for it.
+"""
+import threading
+import time
+
+import utils
+from llm_summary import OLLAMA
+from pipeline import load_match_data
+from scheduler import SingleFlight
+
+
+class SharedResources:
+    def __init__(self, data_ttl=5 * 60, loader=load_match_data):
+        self.session = utils.SESSION
+        self.ollama = OLLAMA
+        self.data_ttl = data_ttl
+        self._loader = loader
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._match_data = {}  # (league ID, gameweek) -> (expires, match reports)
+
+    def player_table(self):
+        return utils.get_player_table()
+
+    def latest_gameweek(self):
+        return self.player_table().latest_gameweek()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._match_data.get(key)
+        if entry and time.time() < entry[0]:
+            return entry[1]
+        return None
+
+    def match_data(self, h2h_league_id, gameweek, on_progress=None):
+        """
+        Return the bio-free match reports for a league and gameweek.
+
+        Concurrent calls for the same key share one load; only the caller
+        that runs it gets ``on_progress`` callbacks.
+        """
+        key = (h2h_league_id, gameweek)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        def load():
+            # Another caller may have finished loading since the check above
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            match_reports = self._loader(h2h_league_id, gameweek, on_progress)
+            with self._lock:
+                self._match_data[key] = (time.time() + self.data_ttl, match_reports)
+            return match_reports
+
+        return self._flight.do(key, load)
+
+    def clear(self):
+        with self._lock:
+            self._match_data.clear()
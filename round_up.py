@@ -0,0 +1,88 @@
+"""
+Map-reduce generation of the gameweek round-up.
+
+Instead of one long generation over the whole league, each fixture gets its
+own small prompt and the write-ups run concurrently against Ollama. A short
+"reduce" prompt over the league table produces the closing summary. The
+pieces are stitched back together in match order, so wall-clock time follows
+the slowest single write-up rather than the sum of all of them.
+
+Ollama only runs requests in parallel when the server allows it, e.g. with
+``OLLAMA_NUM_PARALLEL=4 ollama serve``; otherwise they queue.
+"""
+from concurrent.futures import as_completed
+
+from llm_summary import query_ollama
+from metrics import ContextThreadPoolExecutor
+from prompt_encoder import encode_bios, encode_match, encode_transfers_of_the_week
+
+MATCH_INSTRUCTIONS = (
+    "Write the section of the round-up for this one fixture only: a title giving the "
+    "fixture and the scoreline, then a paragraph or two telling the story of the match."
+)
+
+TABLE_INSTRUCTIONS = (
+    "Write a very brief League Table summary for the end of the round-up, highlighting "
+    "changes in position and the important narratives. Only use the teams listed."
+)
+
+
+def build_match_prompt(instructions, report):
+    """Prompt for a single fixture: shared instructions plus that match's data."""
+    return "\n".join([
+        instructions,
+        encode_bios([report]),
+        "",
+        encode_match(report),
+        "",
+        MATCH_INSTRUCTIONS,
+    ])
+
+
+def build_table_prompt(instructions, match_reports):
+    """Prompt for the closing league table summary, built from every team's standing."""
+    teams = [report[side] for report in match_reports for side in ("team_1", "team_2")]
+    teams.sort(key=lambda team: team["league_rank"])
+    lines = [
+        f"{team['league_rank']}. {team['name']} (was {team['previous_league_rank']}) | "
+        f"league pts {team['overall_league_points']} | this week {team['manager_points']}pts"
+        for team in teams
+    ]
+    transfers = encode_transfers_of_the_week(match_reports)
+    return "\n".join([instructions, "LEAGUE TABLE", *lines, "", *([transfers, ""] if transfers else []),
+                      TABLE_INSTRUCTIONS])
+
+
+def generate_round_up(match_reports, instructions, model="llama3", max_workers=4,
+                      options=None, force=False, on_section=None):
+    """
+    Generate the round-up with one concurrent request per match plus one for
+    the league table, and return the sections joined in match order.
+
+    ``match_reports`` can be any iterable, including a generator such as
+    ``pipeline.stream_match_data``: each match is sent to the model as soon
+    as its report arrives, so writing overlaps with fetching.
+
+    ``on_section(index, text)`` is called as each section finishes; ``index``
+    counts reports in the order they arrived and the league table section
+    has index ``len(match_reports)``.
+    """
+    reports = []
+    futures = {}
+    with ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        for report in match_reports:
+            prompt = build_match_prompt(instructions, report)
+            futures[pool.submit(query_ollama, prompt, model, options, force)] = len(reports)
+            reports.append(report)
+        prompt = build_table_prompt(instructions, reports)
+        futures[pool.submit(query_ollama, prompt, model, options, force)] = len(reports)
+
+        sections = [None] * len(futures)
+        for future in as_completed(futures):
+            index = futures[future]
+            sections[index] = future.result().strip()
+            if on_section:
+                on_section(index, sections[index])
+
+    order = sorted(range(len(reports)), key=lambda index: reports[index]["match"])
+    return "\n\n".join([sections[index] for index in order] + [sections[-1]])
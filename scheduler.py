@@ -0,0 +1,185 @@
+"""
+Shared request scheduler for FPL API calls.
+
+Every request goes through one ``RequestScheduler`` which combines:
+
+* a token bucket capping the overall request rate,
+* an adaptive concurrency limit that halves when the API answers 429 and
+  creeps back up (additive increase) while responses are healthy,
+* retries with jittered exponential backoff for 429s, 5xx responses,
+  timeouts and connection errors, honouring ``Retry-After`` when given.
+
+This keeps concurrent fetches close to what the API will tolerate without
+getting throttled, and turns transient failures into retries instead of
+aborting the whole run. ``SingleFlight`` lets identical concurrent requests
+share one fetch.
+"""
+import random
+import threading
+import time
+
+import requests
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allow ``rate`` requests per second on average, with bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RequestScheduler:
+    def __init__(self, rate=20.0, burst=20, max_concurrency=8, min_concurrency=1,
+                 max_retries=5, base_delay=0.5, max_delay=30.0, timeout=(5, 30), on_event=None):
+        # A rate of 0 (or None) turns the token bucket off
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        # Called with "retry" or "throttled" so callers can count them
+        self.on_event = on_event
+        self._limit = float(max_concurrency)
+        self._active = 0
+        self._slots = threading.Condition()
+
+    @property
+    def concurrency_limit(self):
+        return int(self._limit)
+
+    def _acquire(self):
+        with self._slots:
+            while self._active >= max(self.min_concurrency, int(self._limit)):
+                self._slots.wait()
+            self._active += 1
+
+    def _release(self):
+        with self._slots:
+            self._active -= 1
+            self._slots.notify_all()
+
+    def _on_success(self):
+        with self._slots:
+            # Additive increase: roughly +1 slot per "limit" healthy responses
+            self._limit = min(self.max_concurrency, self._limit + 1 / max(self._limit, 1))
+            self._slots.notify_all()
+
+    def _on_throttled(self):
+        with self._slots:
+            # Multiplicative decrease
+            self._limit = max(self.min_concurrency, self._limit / 2)
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            # "Full jitter" exponential backoff
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        time.sleep(delay)
+
+    def _notify(self, event):
+        if self.on_event:
+            self.on_event(event)
+
+    def request(self, send, rate_limited=True):
+        """
+        Run ``send(timeout=...)`` under the rate and concurrency limits, retrying
+        transient failures. Returns the last response (which may still be an
+        error after the final retry) so the caller can ``raise_for_status``.
+        Pass ``rate_limited=False`` to skip the token bucket.
+        """
+        for attempt in range(self.max_retries + 1):
+            final = attempt == self.max_retries
+            if rate_limited and self.bucket is not None:
+                self.bucket.take()
+            self._acquire()
+            try:
+                resp = send(timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if final:
+                    raise
+                self._notify("retry")
+                self._backoff(attempt)
+                continue
+            finally:
+                self._release()
+
+            if resp.status_code not in RETRY_STATUSES:
+                self._on_success()
+                return resp
+
+            if resp.status_code == 429:
+                self._on_throttled()
+                self._notify("throttled")
+            if final:
+                return resp
+            self._notify("retry")
+            resp.close()
+            self._backoff(attempt, _retry_after(resp))
+        return resp
+
+
+def _retry_after(resp):
+    value = resp.headers.get("Retry-After")
+    try:
+        return min(float(value), 120.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for it and get the same result (or exception) instead
+    of starting a duplicate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+
+        if not leader:
+            call["done"].wait()
+        else:
+            try:
+                call["result"] = fn()
+            except BaseException as error:
+                call["error"] = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call["done"].set()
+
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
@@ -0,0 +1,71 @@
+class LeagueStandings:
+    """
+    H2H league standings indexed by entry ID.
+
+    ``results`` keeps every row in rank order, ``by_entry`` gives O(1) lookups
+    for a manager's row and ``average`` holds the AVERAGE row (or ``None`` if
+    the league has an even number of teams).
+    """
+
+    __slots__ = ("results", "by_entry", "average")
+
+    def __init__(self, results):
+        self.results = results
+        self.by_entry = {}
+        self.average = None
+        for row in results:
+            if row.get("entry_name") == "AVERAGE":
+                self.average = row
+            elif row.get("entry") is not None:
+                self.by_entry[row["entry"]] = row
+
+    def __len__(self):
+        return len(self.results)
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __getitem__(self, entry_id):
+        return self.by_entry[entry_id]
+
+    def get(self, entry_id, default=None):
+        return self.by_entry.get(entry_id, default)
+
+
+def standings_from_fixtures(fixtures, gameweek):
+    """
+    Rebuild the H2H table as it stood after ``gameweek`` from the match list.
+
+    The live standings endpoint only describes the current state, so past
+    gameweeks need their table recomputed: 3 points for a win, 1 for a draw,
+    ranked on league points then points scored. ``last_rank`` is the rank
+    after the previous gameweek.
+    """
+    def table_after(gw):
+        rows = {}
+        for match in fixtures:
+            if match["event"] > gw:
+                continue
+            sides = (
+                (match["entry_1_entry"], match["entry_1_name"], match["entry_1_points"], match["entry_2_points"]),
+                (match["entry_2_entry"], match["entry_2_name"], match["entry_2_points"], match["entry_1_points"]),
+            )
+            for entry, name, scored, conceded in sides:
+                key = "AVERAGE" if name == "AVERAGE" else entry
+                row = rows.setdefault(key, {"entry": entry, "entry_name": name, "total": 0, "points_for": 0})
+                row["points_for"] += scored
+                row["total"] += 3 if scored > conceded else 1 if scored == conceded else 0
+        ordered = sorted(rows.values(), key=lambda r: (-r["total"], -r["points_for"]))
+        for rank, row in enumerate(ordered, start=1):
+            row["rank"] = rank
+        return ordered
+
+    previous_ranks = {
+        ("AVERAGE" if row["entry_name"] == "AVERAGE" else row["entry"]): row["rank"]
+        for row in table_after(gameweek - 1)
+    }
+    results = table_after(gameweek)
+    for row in results:
+        key = "AVERAGE" if row["entry_name"] == "AVERAGE" else row["entry"]
+        row["last_rank"] = previous_ranks.get(key, 0)
+    return LeagueStandings(results)
@@ -0,0 +1,304 @@
+"""
+Local SQLite store of everything the data stage fetches: players, events,
+standings snapshots, H2H matches, picks, entry history and transfers.
+
+The pipeline writes each run into ``STORE`` so season-level questions (a
+head-to-head record, a manager's season history) are answered with local
+queries instead of re-crawling the API. ``backfill.py`` fills in past gameweeks.
+"""
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    web_name TEXT
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    deadline_time TEXT,
+    finished INTEGER,
+    data_checked INTEGER,
+    average_entry_score INTEGER,
+    highest_score INTEGER
+);
+CREATE TABLE IF NOT EXISTS standings (
+    league_id INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    entry INTEGER NOT NULL,
+    entry_name TEXT,
+    rank INTEGER,
+    last_rank INTEGER,
+    total INTEGER,
+    points_for INTEGER,
+    PRIMARY KEY (league_id, event, entry)
+);
+CREATE INDEX IF NOT EXISTS idx_standings_entry_event ON standings (entry, event);
+CREATE TABLE IF NOT EXISTS h2h_matches (
+    id INTEGER PRIMARY KEY,
+    league_id INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    entry_1 INTEGER,
+    entry_1_name TEXT,
+    entry_1_points INTEGER,
+    entry_2 INTEGER,
+    entry_2_name TEXT,
+    entry_2_points INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_h2h_matches_league_event ON h2h_matches (league_id, event);
+CREATE INDEX IF NOT EXISTS idx_h2h_matches_entry_1_event ON h2h_matches (entry_1, event);
+CREATE INDEX IF NOT EXISTS idx_h2h_matches_entry_2_event ON h2h_matches (entry_2, event);
+CREATE TABLE IF NOT EXISTS picks (
+    entry INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    element INTEGER NOT NULL,
+    multiplier INTEGER,
+    is_captain INTEGER,
+    is_vice_captain INTEGER,
+    PRIMARY KEY (entry, event, position)
+);
+CREATE TABLE IF NOT EXISTS entry_history (
+    entry INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    points INTEGER,
+    total_points INTEGER,
+    rank INTEGER,
+    overall_rank INTEGER,
+    points_on_bench INTEGER,
+    event_transfers INTEGER,
+    event_transfers_cost INTEGER,
+    chip TEXT,
+    PRIMARY KEY (entry, event)
+);
+CREATE TABLE IF NOT EXISTS history_synced (
+    entry INTEGER PRIMARY KEY,
+    event INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transfers (
+    entry INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    element_in INTEGER NOT NULL,
+    element_out INTEGER NOT NULL,
+    element_in_cost INTEGER,
+    element_out_cost INTEGER,
+    time TEXT,
+    PRIMARY KEY (entry, event, element_in, element_out)
+);
+CREATE TABLE IF NOT EXISTS transfers_synced (
+    entry INTEGER PRIMARY KEY,
+    event INTEGER NOT NULL
+);
+"""
+
+_EVENT_COLUMNS = ("id", "name", "deadline_time", "finished", "data_checked", "average_entry_score", "highest_score")
+_HISTORY_COLUMNS = (
+    "points", "total_points", "rank", "overall_rank",
+    "points_on_bench", "event_transfers", "event_transfers_cost",
+)
+_TRANSFER_COLUMNS = ("entry", "event", "element_in", "element_out", "element_in_cost", "element_out_cost", "time")
+
+
+class FPLStore:
+    """
+    Thin wrapper around one SQLite database file.
+
+    The connection is opened on first use and shared between threads behind
+    a lock. All writes are bulk upserts (``INSERT OR REPLACE`` through
+    ``executemany``) inside a single transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def upsert(self, table, columns, rows):
+        """Insert or replace ``rows`` (sequences matching ``columns``) in one transaction."""
+        sql = (f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(sql, rows)
+
+    def query(self, sql, params=()):
+        """Run a read query and return the rows as dicts."""
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(sql, params)]
+
+    # -- writes ------------------------------------------------------------
+
+    def record_players(self, player_table):
+        self.upsert("players", ("id", "web_name"), (
+            (element, name) for element, name in enumerate(player_table.names) if name is not None
+        ))
+        self.upsert("events", _EVENT_COLUMNS, (
+            tuple(event.get(column) for column in _EVENT_COLUMNS) for event in player_table.events
+        ))
+
+    def record_standings(self, league_id, event, standings):
+        # The AVERAGE row has no entry ID and isn't stored
+        self.upsert("standings", (
+            "league_id", "event", "entry", "entry_name", "rank", "last_rank", "total", "points_for",
+        ), (
+            (league_id, event, row["entry"], row.get("entry_name"), row.get("rank"),
+             row.get("last_rank"), row.get("total"), row.get("points_for"))
+            for row in standings if row.get("entry") is not None and row.get("entry_name") != "AVERAGE"
+        ))
+
+    def record_matches(self, league_id, fixtures):
+        self.upsert("h2h_matches", (
+            "id", "league_id", "event", "entry_1", "entry_1_name", "entry_1_points",
+            "entry_2", "entry_2_name", "entry_2_points",
+        ), (
+            (match["id"], league_id, match["event"],
+             match["entry_1_entry"], match["entry_1_name"], match["entry_1_points"],
+             match["entry_2_entry"], match["entry_2_name"], match["entry_2_points"])
+            for match in fixtures
+        ))
+
+    def record_picks(self, event, picks_lookup):
+        """Store picks and the matching entry history row for each manager."""
+        self.upsert("picks", (
+            "entry", "event", "position", "element", "multiplier", "is_captain", "is_vice_captain",
+        ), (
+            (entry, event, pick["position"], pick["element"], pick.get("multiplier"),
+             int(bool(pick.get("is_captain"))), int(bool(pick.get("is_vice_captain"))))
+            for entry, picks_data in picks_lookup.items() for pick in picks_data["picks"]
+        ))
+        self.upsert("entry_history", ("entry", "event") + _HISTORY_COLUMNS + ("chip",), (
+            (entry, event) + tuple(picks_data["entry_history"].get(column) for column in _HISTORY_COLUMNS)
+            + (picks_data.get("active_chip"),)
+            for entry, picks_data in picks_lookup.items()
+        ))
+
+    def record_histories(self, histories, through_event):
+        """
+        Store ``entry/{id}/history`` responses, keyed by manager ID, and mark
+        each manager's stored history complete up to ``through_event``.
+        """
+        def rows():
+            for entry, history in histories.items():
+                chips = {chip["event"]: chip["name"] for chip in history.get("chips", [])}
+                for gw in history.get("current", []):
+                    yield ((entry, gw["event"]) + tuple(gw.get(column) for column in _HISTORY_COLUMNS)
+                           + (chips.get(gw["event"]),))
+
+        self.upsert("entry_history", ("entry", "event") + _HISTORY_COLUMNS + ("chip",), rows())
+        self.upsert("history_synced", ("entry", "event"), ((entry, through_event) for entry in histories))
+
+    def record_transfers(self, transfers_by_entry, through_event):
+        """
+        Store ``entry/{id}/transfers`` responses, keyed by manager ID, and
+        mark each manager's stored transfers complete up to ``through_event``.
+        """
+        self.upsert("transfers", _TRANSFER_COLUMNS, (
+            (entry,) + tuple(transfer.get(column) for column in _TRANSFER_COLUMNS[1:])
+            for entry, transfers in transfers_by_entry.items() for transfer in transfers or ()
+        ))
+        self.upsert("transfers_synced", ("entry", "event"),
+                    ((entry, through_event) for entry in transfers_by_entry))
+
+    # -- queries -----------------------------------------------------------
+
+    def head_to_head(self, league_id, entry, opponent, before_event=None):
+        """
+        ``entry``'s record against ``opponent`` in a league, optionally only
+        counting matches before ``before_event``.
+        """
+        rows = self.query(
+            """
+            SELECT event, entry_1, entry_1_points, entry_2_points FROM h2h_matches
+            WHERE league_id = ? AND event < ?
+              AND ((entry_1 = ? AND entry_2 = ?) OR (entry_1 = ? AND entry_2 = ?))
+            ORDER BY event
+            """,
+            (league_id, before_event if before_event is not None else 1 << 31,
+             entry, opponent, opponent, entry),
+        )
+        record = {"played": 0, "won": 0, "drawn": 0, "lost": 0, "points_for": 0, "points_against": 0}
+        for row in rows:
+            scored, conceded = row["entry_1_points"], row["entry_2_points"]
+            if row["entry_1"] != entry:
+                scored, conceded = conceded, scored
+            record["played"] += 1
+            record["won" if scored > conceded else "drawn" if scored == conceded else "lost"] += 1
+            record["points_for"] += scored
+            record["points_against"] += conceded
+        return record
+
+    def matches(self, league_id, up_to_event=None):
+        """Stored H2H matches for a league, shaped like the API's match results."""
+        return self.query(
+            """
+            SELECT id, event, entry_1 AS entry_1_entry, entry_1_name, entry_1_points,
+                   entry_2 AS entry_2_entry, entry_2_name, entry_2_points
+            FROM h2h_matches WHERE league_id = ? AND event <= ? ORDER BY event, id
+            """,
+            (league_id, up_to_event if up_to_event is not None else 1 << 31),
+        )
+
+    def entry_history(self, entry):
+        """A manager's stored gameweek history, oldest first."""
+        return self.query("SELECT * FROM entry_history WHERE entry = ? ORDER BY event", (entry,))
+
+    def histories(self, entries, through_event):
+        """
+        Stored histories, shaped like ``entry/{id}/history`` responses, for
+        the managers in ``entries`` whose history is complete up to
+        ``through_event``. Managers without one are left out.
+        """
+        synced = {row["entry"] for row in self.query(
+            "SELECT entry FROM history_synced WHERE event >= ?", (through_event,)
+        )}
+        histories = {}
+        for entry in entries:
+            if entry in synced:
+                rows = self.entry_history(entry)
+                histories[entry] = {
+                    "current": [{column: row[column] for column in ("event",) + _HISTORY_COLUMNS}
+                                for row in rows],
+                    "chips": [{"name": row["chip"], "event": row["event"]} for row in rows if row["chip"]],
+                }
+        return histories
+
+    def transfers(self, entries, through_event):
+        """
+        Stored transfer lists, newest first like ``entry/{id}/transfers``,
+        for the managers in ``entries`` whose transfers are complete up to
+        ``through_event``. Managers without one are left out.
+        """
+        synced = {row["entry"] for row in self.query(
+            "SELECT entry FROM transfers_synced WHERE event >= ?", (through_event,)
+        )}
+        transfers = {entry: [] for entry in entries if entry in synced}
+        for row in self.query(
+            "SELECT * FROM transfers WHERE entry IN (SELECT entry FROM transfers_synced WHERE event >= ?) "
+            "ORDER BY event DESC, time DESC",
+            (through_event,),
+        ):
+            if row["entry"] in transfers:
+                transfers[row["entry"]].append(row)
+        return transfers
+
+
+STORE = FPLStore(os.environ.get("FPL_STORE_PATH", "fpl_store.sqlite3"))
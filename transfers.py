@@ -0,0 +1,110 @@
+"""
+Transfer impact for a gameweek.
+
+Every manager's transfer list (one request each) is flattened into arrays of
+(manager, player in, player out) for the gameweek and scored against the
+gameweek's points array in one go: a transfer's net is the incoming player's
+points minus the outgoing player's, and a manager's transfer impact is the
+sum of their nets minus ``event_transfers_cost``.
+"""
+import numpy as np
+
+
+class GameweekTransfers:
+    """
+    One gameweek's transfers as flat arrays. ``rows[i]`` is the manager's row
+    in ``entries`` for transfer ``i``, and ``element_in[i]`` /
+    ``element_out[i]`` the players bought and sold.
+    """
+
+    __slots__ = ("gameweek", "entries", "rows", "element_in", "element_out")
+
+    def __init__(self, transfers_by_entry, gameweek):
+        self.gameweek = gameweek
+        self.entries = list(transfers_by_entry)
+        transfers = [
+            (i, transfer["element_in"], transfer["element_out"])
+            for i, entry in enumerate(self.entries)
+            for transfer in transfers_by_entry[entry] or ()
+            if transfer.get("event") == gameweek
+        ]
+        if transfers:
+            self.rows, self.element_in, self.element_out = (
+                np.array(column, dtype=np.int64) for column in zip(*transfers)
+            )
+        else:
+            self.rows = self.element_in = self.element_out = np.array([], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def net_points(self, points):
+        """Each transfer's points gained: ``points[in] - points[out]``."""
+        points = np.append(np.asarray(points, dtype=np.int64), 0)  # Unknown elements score 0
+        unknown = len(points) - 1
+        return (points[np.minimum(self.element_in, unknown)]
+                - points[np.minimum(self.element_out, unknown)])
+
+    def manager_totals(self, net):
+        """Sum of ``net`` per manager, indexed like ``entries``."""
+        return np.bincount(self.rows, weights=net, minlength=len(self.entries)).astype(np.int64)
+
+
+def add_transfer_impact(match_reports, transfers_by_entry, picks_lookup, player_name_lookup,
+                        player_points_lookup, gameweek):
+    """
+    Add transfer impact to match reports in place.
+
+    Each manager's side gets ``transfer_impact``: the points their transfers
+    gained (``transfer_points``), the hit taken (``cost``), the two combined
+    (``net_points``) and their ``best`` transfer. Each report gets the
+    league-wide ``transfers_of_the_week`` (best and worst single transfer),
+    or nothing if no one made a transfer.
+    """
+    names = {
+        report[side]["manager_id"]: report[side]["name"]
+        for report in match_reports for side in ("team_1", "team_2") if "manager_id" in report[side]
+    }
+    # Only this league's managers count towards the transfers of the week
+    table = GameweekTransfers(
+        {entry: transfers_by_entry[entry] for entry in names if entry in transfers_by_entry}, gameweek
+    )
+    net = table.net_points(player_points_lookup)
+    totals = table.manager_totals(net)
+
+    def describe(i):
+        entry = table.entries[table.rows[i]]
+        element_in, element_out = table.element_in[i], table.element_out[i]
+        return {
+            "manager_id": entry,
+            "team": names.get(entry),
+            "in": player_name_lookup[element_in] if element_in < len(player_name_lookup) else None,
+            "out": player_name_lookup[element_out] if element_out < len(player_name_lookup) else None,
+            "net": int(net[i]),
+        }
+
+    # Each manager's best transfer: sort by (manager, -net) and take the first of each run
+    order = np.lexsort((-net, table.rows))
+    managers, first = np.unique(table.rows[order], return_index=True)
+    best_by_row = dict(zip(managers.tolist(), order[first].tolist()))
+
+    row = {entry: i for i, entry in enumerate(table.entries)}
+    for report in match_reports:
+        for side in ("team_1", "team_2"):
+            entry = report[side].get("manager_id")
+            if entry not in row:
+                continue
+            cost = picks_lookup.get(entry, {}).get("entry_history", {}).get("event_transfers_cost", 0)
+            best = best_by_row.get(row[entry])
+            report[side]["transfer_impact"] = {
+                "transfer_points": int(totals[row[entry]]),
+                "cost": cost,
+                "net_points": int(totals[row[entry]]) - cost,
+                "best": describe(best) if best is not None else None,
+            }
+
+    if len(table):
+        of_the_week = {"best": describe(int(np.argmax(net))), "worst": describe(int(np.argmin(net)))}
+        for report in match_reports:
+            report["transfers_of_the_week"] = of_the_week
+    return match_reports
@@ -1,27 +1,283 @@
+import json
+import os
+import time
+from array import array
+from email.utils import formatdate
+from urllib.parse import urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from bootstrap import parse_bootstrap
+from cache import DiskCache
+from metrics import METRICS, ContextThreadPoolExecutor
+from scheduler import RequestScheduler, SingleFlight
+from standings import LeagueStandings
+
+BASE_URL = os.environ.get("FPL_API_BASE_URL", "https://fantasy.premierleague.com/api")
+
+# Upper bound on concurrent requests made by the batch helpers
+MAX_WORKERS = 8
+
+# One keep-alive session shared by every helper so repeated calls reuse
+# pooled connections instead of paying a fresh TLS handshake each time.
+SESSION = requests.Session()
+SESSION.headers.update({"Accept-Encoding": "gzip, deflate"})
+_adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+# Every request goes through one scheduler: token-bucket rate limit, adaptive
+# concurrency and retries with jittered backoff for 429s, 5xx and timeouts.
+# FPL_RATE_LIMIT=0 turns the rate limit off; requests to a local server (the
+# mock API) never wait for it.
+SCHEDULER = RequestScheduler(
+    rate=float(os.environ.get("FPL_RATE_LIMIT", "20")),
+    burst=int(os.environ.get("FPL_RATE_BURST", "20")),
+    max_concurrency=MAX_WORKERS,
+    on_event=lambda event: METRICS.incr(f"http_{event}"),
+)
+
+# Identical requests made at the same time (e.g. several app sessions loading
+# the same league) wait for one fetch instead of each hitting the API.
+INFLIGHT = SingleFlight()
+
+# On-disk response cache. Responses for finished gameweeks are kept until
+# evicted; anything else is reused for its TTL and then revalidated.
+CACHE = DiskCache(
+    os.environ.get("FPL_CACHE_DIR", ".fpl_cache"),
+    max_bytes=int(os.environ.get("FPL_CACHE_MAX_MB", "200")) * 1024 * 1024,
+)
+BOOTSTRAP_TTL = 15 * 60
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+LIVE_TTL = 5 * 60
+
+
+def _open(url, params, ttl, stream=False, is_permanent=None):
+    """
+    Look up a request in the response cache and hit the network if needed.
+
+    Returns ``(key, body, response)``: ``body`` is set when the cached copy
+    can be used as-is, otherwise ``response`` is a fresh successful response.
+    A cached copy confirmed by a 304 is checked against ``is_permanent``
+    again, so data cached while a gameweek was live becomes permanent once
+    it has finished.
+    """
+    key = DiskCache.make_key(url, params or {})
+    cached = CACHE.get(key)
+    headers = {}
+    if cached:
+        meta, body = cached
+        if meta.get("permanent") or time.time() - meta["fetched_at"] < ttl:
+            METRICS.incr("cache_hits")
+            return key, body, None
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        else:
+            headers["If-Modified-Since"] = formatdate(meta["fetched_at"], usegmt=True)
 
-BASE_URL = "https://fantasy.premierleague.com/api"
+    resp = SCHEDULER.request(
+        lambda timeout: SESSION.get(url, params=params, headers=headers, stream=stream, timeout=timeout),
+        rate_limited=urlparse(url).hostname not in LOCAL_HOSTS,
+    )
+    METRICS.incr("http_requests")
+    if resp.status_code == 304 and cached:
+        METRICS.incr("cache_revalidated")
+        resp.close()
+        meta["fetched_at"] = time.time()
+        meta["permanent"] = bool(is_permanent and is_permanent(json.loads(body)))
+        CACHE.update_meta(key, meta)
+        return key, body, None
+    resp.raise_for_status()
+    METRICS.incr("cache_misses")
+    return key, None, resp
+
+
+def _store(key, url, params, resp, body, permanent):
+    METRICS.incr("http_bytes", len(body))
+    CACHE.put(key, body, {
+        "url": url,
+        "params": params or {},
+        "fetched_at": time.time(),
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "permanent": permanent,
+    })
+
+
+def _fetch(url, params=None, ttl=LIVE_TTL, is_permanent=None):
+    """
+    Return the raw body for a GET request, going through the response cache.
+
+    ``is_permanent`` is an optional callable that receives the decoded JSON
+    and returns True when the response can never change again (e.g. picks for
+    a finished gameweek). Permanent entries are served without any network
+    call; others are served while younger than ``ttl`` seconds and then
+    revalidated with ETag / If-Modified-Since.
+    """
+    def fetch():
+        key, body, resp = _open(url, params, ttl, is_permanent=is_permanent)
+        if resp is None:
+            return body
+
+        body = resp.content
+        permanent = bool(is_permanent and is_permanent(json.loads(body)))
+        _store(key, url, params, resp, body, permanent)
+        return body
+
+    return INFLIGHT.do(DiskCache.make_key(url, params or {}), fetch)
+
+
+def _fetch_chunks(url, params=None, ttl=LIVE_TTL, chunk_size=64 * 1024):
+    """
+    Like ``_fetch`` but yield the body in chunks as it arrives, so callers can
+    parse large payloads without waiting for (or decoding) the whole thing.
 
-def get_h2h_league_standings(league_id):
+    The body is cached once it has all arrived. A caller that stops early
+    should ``close()`` the generator: the rest of the body is then read and
+    cached, so the next parse doesn't hit the API again.
+    """
+    key, body, resp = _open(url, params, ttl, stream=True)
+    if resp is None:
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+        return
+
+    parts = []
+    with resp:
+        try:
+            for chunk in resp.iter_content(chunk_size):
+                parts.append(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Closed early (e.g. parsing stopped at the closing brace)
+            parts.extend(resp.iter_content(chunk_size))
+            _store(key, url, params, resp, b"".join(parts), permanent=False)
+            raise
+    _store(key, url, params, resp, b"".join(parts), permanent=False)
+
+
+def _get_json(url, params=None, ttl=LIVE_TTL, is_permanent=None):
+    return json.loads(_fetch(url, params=params, ttl=ttl, is_permanent=is_permanent))
+
+
+_player_table = {"expires": 0.0, "table": None}
+
+
+def get_player_table(refresh=False):
+    """
+    Return the compact PlayerTable parsed from bootstrap-static.
+
+    The parsed table is kept in memory for BOOTSTRAP_TTL seconds so repeated
+    lookups (finished events, latest gameweek, name lookups) share one parse.
+    ``refresh`` revalidates bootstrap-static straight away instead.
+    """
+    def load():
+        url = f"{BASE_URL}/bootstrap-static/"
+        ttl = 0 if refresh else BOOTSTRAP_TTL
+        chunks = _fetch_chunks(url, ttl=ttl)
+        try:
+            _player_table["table"] = parse_bootstrap(chunks)
+        finally:
+            chunks.close()  # Reads and caches whatever the parser didn't need
+        _player_table["expires"] = time.time() + BOOTSTRAP_TTL
+        return _player_table["table"]
+
+    if refresh or _player_table["table"] is None or time.time() >= _player_table["expires"]:
+        # One parse however many threads or sessions ask at once
+        return INFLIGHT.do(("player_table", refresh), load)
+    return _player_table["table"]
+
+
+def clear_caches():
+    """Drop every cached API response, on disk and in memory."""
+    CACHE.clear()
+    _player_table["table"] = None
+    _player_table["expires"] = 0.0
+
+
+def get_finished_events():
+    """Return the set of gameweek IDs whose data is final (finished and data checked)."""
+    return get_player_table().finished_events()
+
+
+def get_h2h_league_standings(league_id, page=1):
     url = f"{BASE_URL}/leagues-h2h/{league_id}/standings/"
-    return requests.get(url).json()
+    return _get_json(url, params={"page_standings": page})
 
-def get_h2h_league_matches(league_id):
+def get_league_standings(league_id, parallel=False, max_workers=MAX_WORKERS, size=None):
     """
-    Fetch all paginated match pages for a head-to-head league and return a single
-    dict with an aggregated 'results' list.
+    Fetch every page of a head-to-head league's standings and return them as a
+    LeagueStandings index.
+
+    With ``parallel`` set, later pages are requested concurrently. If
+    ``size`` (the number of standings rows, e.g. two per fixture) is given,
+    exactly the pages needed are requested at once. Otherwise pages go out
+    in waves that double in size up to ``max_workers``, and pages past one
+    that reports nothing after it are skipped rather than requested.
+    """
+    first = get_h2h_league_standings(league_id)["standings"]
+    results = list(first.get("results", []))
+    has_next = first.get("has_next", False)
+    page = 2
+    last_page = [None]  # Set once a page reports it is the last one
+    wave_size = 1
+
+    def fetch(p):
+        if last_page[0] is not None and p > last_page[0]:
+            return None
+        data = get_h2h_league_standings(league_id, p)["standings"]
+        if not data.get("has_next", False):
+            last_page[0] = p if last_page[0] is None else min(last_page[0], p)
+        return data
+
+    while has_next:
+        if parallel:
+            wave_size = min(2 * wave_size, max_workers)
+            if size is not None and results:
+                # Pages hold as many rows as the first one
+                wave_size = max(1, -(-(size - len(results)) // len(results)))
+            wave = range(page, page + wave_size)
+            with ContextThreadPoolExecutor(max_workers=min(max_workers, wave_size)) as pool:
+                pages = list(pool.map(fetch, wave))
+        else:
+            pages = [fetch(page)]
+
+        for data in pages:
+            if data is None:
+                break
+            results.extend(data.get("results", []))
+            has_next = data.get("has_next", False)
+            if not has_next:
+                break
+        page += len(pages)
+
+    return LeagueStandings(results)
+
+def iter_h2h_league_match_pages(league_id, event=None):
+    """
+    Yield each page of a head-to-head league's matches in order.
+
+    Pages whose fixtures all belong to finished gameweeks are cached
+    permanently, so re-walking the list only refetches pages that are new or
+    still in play. Pass ``event`` to ask the API for a single gameweek.
     """
     matches_url = f"{BASE_URL}/leagues-h2h-matches/league/{league_id}"
-    all_results = []
+    finished_events = get_finished_events()
     page = 1
 
-    while True:
-        resp = requests.get(matches_url, params={"page": page})
-        resp.raise_for_status()
-        data = resp.json()
+    def page_is_final(data):
+        results = data.get("results", [])
+        return bool(results) and all(m["event"] in finished_events for m in results)
 
-        page_results = data.get("results", [])
-        all_results.extend(page_results)
+    while True:
+        params = {"page": page}
+        if event is not None:
+            params["event"] = event
+        data = _get_json(matches_url, params=params, is_permanent=page_is_final)
+        yield data
 
         # Stop when API indicates no next page
         if not data.get("has_next", False):
@@ -29,28 +285,156 @@ def get_h2h_league_matches(league_id):
 
         page += 1
 
+def get_h2h_league_matches(league_id):
+    """
+    Fetch all paginated match pages for a head-to-head league and return a single
+    dict with an aggregated 'results' list.
+    """
+    all_results = []
+    for data in iter_h2h_league_match_pages(league_id):
+        all_results.extend(data.get("results", []))
     return {"results": all_results}
 
+def iter_h2h_league_matches_for_event(league_id, event):
+    """
+    Yield one gameweek's matches a page at a time, so a huge league's fixture
+    list never has to be held in memory at once.
+
+    The API is first asked to filter by event. If it ignores the filter, the
+    full match list is walked instead (finished pages come from the cache),
+    keeping only the requested gameweek's matches, and the walk stops as soon
+    as a page moves past it.
+    """
+    yielded = 0
+    for data in iter_h2h_league_match_pages(league_id, event=event):
+        page_results = data.get("results", [])
+        if any(m["event"] != event for m in page_results):
+            break
+        yielded += len(page_results)
+        yield page_results
+    else:
+        return
+
+    # Matches already yielded from the filtered walk are skipped
+    for data in iter_h2h_league_match_pages(league_id):
+        page_results = data.get("results", [])
+        matches = [m for m in page_results if m["event"] == event]
+        skip = min(yielded, len(matches))
+        yielded -= skip
+        if matches[skip:]:
+            yield matches[skip:]
+        if page_results and page_results[-1]["event"] > event:
+            break
+
+def get_h2h_league_matches_for_event(league_id, event):
+    """
+    Fetch only the matches for one gameweek, returned in the same shape as
+    get_h2h_league_matches (see iter_h2h_league_matches_for_event).
+    """
+    return {"results": [m for page in iter_h2h_league_matches_for_event(league_id, event) for m in page]}
+
 def get_manager_history(manager_id):
     url = f"{BASE_URL}/entry/{manager_id}/history/"
-    return requests.get(url).json()
+    return _get_json(url)
 
-def get_manager_latest_transfers(manager_id):
-    url = f"{BASE_URL}/entry/{manager_id}/transfers-latest/"
-    return requests.get(url).json()
+def get_manager_transfers(manager_id):
+    url = f"{BASE_URL}/entry/{manager_id}/transfers/"
+    return _get_json(url)
 
 def get_gameweek_picks(manager_id, gw):
     url = f"{BASE_URL}/entry/{manager_id}/event/{gw}/picks/"
-    return requests.get(url).json()
+    finished = gw in get_finished_events()
+    return _get_json(url, is_permanent=lambda data: finished)
+
+def get_gameweek_picks_batch(manager_ids, gw, max_workers=MAX_WORKERS):
+    """
+    Fetch picks for several managers in parallel over the shared session and
+    return a dict mapping manager ID to its picks response.
+
+    Duplicate IDs are only requested once, so the whole batch takes roughly as
+    long as the slowest single request.
+    """
+    unique_ids = list(dict.fromkeys(manager_ids))
+    if not unique_ids:
+        return {}
+
+    get_finished_events()  # Warm once so worker threads don't all parse bootstrap-static
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(unique_ids))) as pool:
+        responses = pool.map(lambda manager_id: get_gameweek_picks(manager_id, gw), unique_ids)
+        return dict(zip(unique_ids, responses))
+
+def get_manager_history_batch(manager_ids, max_workers=MAX_WORKERS):
+    """Fetch several managers' season histories in parallel, keyed by manager ID."""
+    unique_ids = list(dict.fromkeys(manager_ids))
+    if not unique_ids:
+        return {}
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(unique_ids))) as pool:
+        return dict(zip(unique_ids, pool.map(get_manager_history, unique_ids)))
+
+def get_manager_transfers_batch(manager_ids, max_workers=MAX_WORKERS):
+    """
+    Fetch several managers' transfer lists in parallel, keyed by manager ID.
+    Each list covers the whole season, so one request per manager serves
+    every gameweek.
+    """
+    unique_ids = list(dict.fromkeys(manager_ids))
+    if not unique_ids:
+        return {}
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(unique_ids))) as pool:
+        return dict(zip(unique_ids, pool.map(get_manager_transfers, unique_ids)))
+
+def get_picks_for_gameweeks(entries_by_gw, max_workers=MAX_WORKERS):
+    """
+    Fetch picks for many (manager, gameweek) pairs in one concurrent batch.
+
+    ``entries_by_gw`` maps gameweek to an iterable of manager IDs; the result
+    maps gameweek to a dict of manager ID to picks response.
+    """
+    pairs = [(gw, manager_id) for gw, ids in entries_by_gw.items() for manager_id in dict.fromkeys(ids)]
+    results = {gw: {} for gw in entries_by_gw}
+    if not pairs:
+        return results
+
+    get_finished_events()  # Warm once so worker threads don't all parse bootstrap-static
+    with ContextThreadPoolExecutor(max_workers=min(max_workers, len(pairs))) as pool:
+        responses = pool.map(lambda pair: get_gameweek_picks(pair[1], pair[0]), pairs)
+        for (gw, manager_id), picks_data in zip(pairs, responses):
+            results[gw][manager_id] = picks_data
+    return results
+
+def get_fixture_entry_ids(fixtures, gw):
+    """Return the real (non-AVERAGE) entry IDs playing in a gameweek's fixtures."""
+    entry_ids = []
+    for match in fixtures:
+        if match["event"] != gw:
+            continue
+        if match["entry_1_name"] != "AVERAGE":
+            entry_ids.append(match["entry_1_entry"])
+        if match["entry_2_name"] != "AVERAGE":
+            entry_ids.append(match["entry_2_entry"])
+    return entry_ids
+
+def get_event_live(gw, ttl=LIVE_TTL):
+    url = f"{BASE_URL}/event/{gw}/live/"
+    finished = gw in get_finished_events()
+    return _get_json(url, ttl=ttl, is_permanent=lambda data: finished)
+
+def get_event_points(gw, size=0, ttl=LIVE_TTL):
+    """
+    Return a gameweek's points as a dense array indexed by element ID, built
+    from ``event/{gw}/live``. ``size`` pads the array to at least that length
+    so it lines up with the player table. Pass ``ttl=0`` to always revalidate.
+    """
+    elements = get_event_live(gw, ttl).get("elements", [])
+    length = max([size] + [element["id"] + 1 for element in elements])
+    points = array("h", bytes(2 * length))
+    for element in elements:
+        points[element["id"]] = element["stats"]["total_points"]
+    return points
 
 def get_player_data():
     url = f"{BASE_URL}/bootstrap-static/"
-    return requests.get(url).json()
+    return _get_json(url, ttl=BOOTSTRAP_TTL)
 
 def get_latest_gameweek():
-    url = f"{BASE_URL}/bootstrap-static/"
-    data = requests.get(url).json()
-    for event in data.get("events", []):
-        if event.get("is_previous", True):
-            gameweek = event.get("id")
-    return gameweek
+    return get_player_table().latest_gameweek()